@@ -3,9 +3,19 @@
 SimpleMind MCP - Example Usage Scripts
 
 Run these examples to see what the SimpleMind parser can do!
+
+Without arguments an interactive menu is shown. To run a single example
+non-interactively (e.g. for scripting or profiling), pass --example:
+
+    python examples.py --example 2 --file map.smmx --query python
+    python examples.py --example 6 --title "New Map" --topics Ideas Tasks
+
+Anything not given on the command line is still prompted for.
 """
 
+import os
 import sys
+from itertools import islice
 from pathlib import Path
 
 # Add current directory to path
@@ -21,14 +31,15 @@ from simplemind_parser import (
 )
 
 
-def example_1_read_and_explore():
+def example_1_read_and_explore(filepath=None):
     """Example 1: Read a mind map and explore its structure"""
     print("=" * 60)
     print("EXAMPLE 1: Reading and Exploring a Mind Map")
     print("=" * 60)
     
     # Update this path to your actual .smmx file
-    filepath = input("Enter path to your .smmx file: ").strip()
+    if filepath is None:
+        filepath = input("Enter path to your .smmx file: ").strip()
     
     try:
         # Load the mind map
@@ -40,8 +51,11 @@ def example_1_read_and_explore():
         
         # Show top-level structure
         print(f"\n  Top-level branches:")
-        for i, child in enumerate(mindmap.root_node.children, 1):
-            print(f"    {i}. {child.text} ({len(child.children)} children)")
+        if mindmap.root_node.children:
+            print("\n".join(
+                f"    {i}. {child.text} ({len(child.children)} children)"
+                for i, child in enumerate(mindmap.root_node.children, 1)
+            ))
         
         return mindmap
     
@@ -50,7 +64,7 @@ def example_1_read_and_explore():
         return None
 
 
-def example_2_search_nodes(mindmap):
+def example_2_search_nodes(mindmap, query=None):
     """Example 2: Search for nodes"""
     if not mindmap:
         print("No mind map loaded!")
@@ -60,7 +74,8 @@ def example_2_search_nodes(mindmap):
     print("EXAMPLE 2: Searching Nodes")
     print("=" * 60)
     
-    query = input("\nEnter search term: ").strip()
+    if query is None:
+        query = input("\nEnter search term: ").strip()
     
     results = mindmap.search_nodes(query, search_notes=True)
     
@@ -68,14 +83,16 @@ def example_2_search_nodes(mindmap):
         print(f"No results found for '{query}'")
         return
     
-    print(f"\n✓ Found {len(results)} nodes matching '{query}':")
+    # Format everything first and write it out in one go
+    lines = [f"\n✓ Found {len(results)} nodes matching '{query}':"]
     for i, node in enumerate(results, 1):
         has_notes = "📝" if node.notes else "📄"
-        print(f"  {i}. {has_notes} {node.text} (ID: {node.id})")
+        lines.append(f"  {i}. {has_notes} {node.text} (ID: {node.id})")
         if node.notes and len(node.notes) < 100:
-            print(f"     Notes: {node.notes}")
+            lines.append(f"     Notes: {node.notes}")
         elif node.notes:
-            print(f"     Notes: {node.notes[:100]}...")
+            lines.append(f"     Notes: {node.notes[:100]}...")
+    print("\n".join(lines))
 
 
 def example_3_find_incomplete(mindmap):
@@ -88,26 +105,29 @@ def example_3_find_incomplete(mindmap):
     print("EXAMPLE 3: Finding Incomplete Topics")
     print("=" * 60)
     
-    empty_nodes = [
-        node for node in mindmap.nodes.values()
-        if not node.notes and node.parent_id != "-1"
-    ]
+    empty_nodes = mindmap.nodes_without_notes()
     
     if not empty_nodes:
         print("\n✓ All nodes have content! Great job!")
         return
     
-    print(f"\n✓ Found {len(empty_nodes)} nodes without notes:")
+    # Look up each distinct parent once for context
+    parents = {
+        parent_id: mindmap.get_node(parent_id)
+        for parent_id in {node.parent_id for node in empty_nodes}
+    }
+    
+    lines = [f"\n✓ Found {len(empty_nodes)} nodes without notes:"]
     for i, node in enumerate(empty_nodes, 1):
-        # Get parent for context
-        parent = mindmap.get_node(node.parent_id)
+        parent = parents[node.parent_id]
         parent_text = parent.text if parent else "Unknown"
-        print(f"  {i}. {node.text} (under '{parent_text}', ID: {node.id})")
+        lines.append(f"  {i}. {node.text} (under '{parent_text}', ID: {node.id})")
+    print("\n".join(lines))
     
     return empty_nodes
 
 
-def example_4_add_node(mindmap, filepath):
+def example_4_add_node(mindmap, filepath, parent_id=None, text=None, notes=None):
     """Example 4: Add a new node"""
     if not mindmap:
         print("No mind map loaded!")
@@ -117,24 +137,27 @@ def example_4_add_node(mindmap, filepath):
     print("EXAMPLE 4: Adding a New Node")
     print("=" * 60)
     
-    print("\nAvailable parent nodes:")
-    for i, (node_id, node) in enumerate(list(mindmap.nodes.items())[:10], 1):
-        print(f"  {i}. {node.text} (ID: {node_id})")
-    
-    parent_id = input("\nEnter parent node ID: ").strip()
+    if parent_id is None:
+        print("\nAvailable parent nodes:")
+        for i, (node_id, node) in enumerate(islice(mindmap.nodes.items(), 10), 1):
+            print(f"  {i}. {node.text} (ID: {node_id})")
+        
+        parent_id = input("\nEnter parent node ID: ").strip()
     
-    if parent_id not in mindmap.nodes:
+    parent = mindmap.get_node(parent_id)
+    if not parent:
         print(f"Error: Node ID '{parent_id}' not found")
         return
     
-    text = input("Enter text for new node: ").strip()
-    notes = input("Enter notes (optional): ").strip()
+    if text is None:
+        text = input("Enter text for new node: ").strip()
+    if notes is None:
+        notes = input("Enter notes (optional): ").strip()
     
     # Generate new ID
-    new_id = str(max([int(nid) for nid in mindmap.nodes.keys()]) + 1)
+    new_id = mindmap.next_node_id()
     
-    # Get parent position
-    parent = mindmap.get_node(parent_id)
+    # Position relative to the parent
     new_x = parent.x + 100
     new_y = parent.y + (len(parent.children) * 50)
     
@@ -159,7 +182,7 @@ def example_4_add_node(mindmap, filepath):
     print(f"✓ Saved to: {output_path}")
 
 
-def example_5_export(mindmap, filepath):
+def example_5_export(mindmap, filepath, choice=None):
     """Example 5: Export to different formats"""
     if not mindmap:
         print("No mind map loaded!")
@@ -169,36 +192,38 @@ def example_5_export(mindmap, filepath):
     print("EXAMPLE 5: Exporting Mind Map")
     print("=" * 60)
     
-    print("\nChoose export format:")
-    print("  1. Markdown (hierarchical)")
-    print("  2. JSON (structured data)")
-    print("  3. Both")
-    
-    choice = input("\nYour choice (1-3): ").strip()
+    if choice is None:
+        print("\nChoose export format:")
+        print("  1. Markdown (hierarchical)")
+        print("  2. JSON (structured data)")
+        print("  3. Both")
+        
+        choice = input("\nYour choice (1-3): ").strip()
     
     base_path = filepath.replace('.smmx', '')
     
     if choice in ['1', '3']:
         md_path = f"{base_path}_export.md"
-        markdown = export_to_markdown(filepath, md_path)
+        markdown = export_to_markdown(mindmap, md_path)
         print(f"\n✓ Exported to Markdown: {md_path}")
         print(f"  Preview (first 300 chars):")
         print(f"  {markdown[:300]}...")
     
     if choice in ['2', '3']:
         json_path = f"{base_path}_export.json"
-        json_output = export_to_json(filepath, json_path)
+        json_output = export_to_json(mindmap, json_path)
         print(f"\n✓ Exported to JSON: {json_path}")
         print(f"  File size: {len(json_output)} characters")
 
 
-def example_6_create_new():
+def example_6_create_new(title=None, topics=None):
     """Example 6: Create a brand new mind map"""
     print("\n" + "=" * 60)
     print("EXAMPLE 6: Creating a New Mind Map")
     print("=" * 60)
     
-    title = input("\nEnter mind map title: ").strip()
+    if title is None:
+        title = input("\nEnter mind map title: ").strip()
     
     # Create new mind map
     mindmap = SimpleMindMap(title=title)
@@ -215,13 +240,17 @@ def example_6_create_new():
     mindmap.add_node(root)
     
     # Add a few child nodes
-    print("\nAdd some initial topics (press Enter with empty text to finish):")
-    
-    for i in range(1, 100):
-        topic = input(f"  Topic {i}: ").strip()
-        if not topic:
-            break
-        
+    if topics is None:
+        topics = []
+        print("\nAdd some initial topics (press Enter with empty text to finish):")
+        for i in range(1, 100):
+            topic = input(f"  Topic {i}: ").strip()
+            if not topic:
+                break
+            topics.append(topic)
+    
+    children = []
+    for i, topic in enumerate(topics[:99], 1):
         child = SimpleMindNode(
             id=str(i),
             text=topic,
@@ -230,7 +259,9 @@ def example_6_create_new():
             y=300 + (i // 4) * 100,
             guid=f"GUID_{i}"
         )
-        mindmap.add_node(child)
+        children.append(child)
+    
+    mindmap.add_nodes(children)
     
     # Save
     filename = f"{title.replace(' ', '_')}.smmx"
@@ -241,12 +272,27 @@ def example_6_create_new():
     print(f"  Nodes: {len(mindmap.nodes)}")
 
 
+def load_mindmap_cached(filepath, cache):
+    """Read a mind map, reusing the copy in cache while the file is unchanged"""
+    mtime = os.stat(filepath).st_mtime
+    cached = cache.get(filepath)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    mindmap = read_mindmap(filepath)
+    cache[filepath] = (mtime, mindmap)
+    return mindmap
+
+
 def main():
     """Run the examples"""
     print("\n" + "=" * 60)
     print("SimpleMind Parser - Example Scripts")
     print("=" * 60)
     
+    # filepath -> (mtime, mind map), so repeated examples skip re-parsing
+    loaded = {}
+    
     while True:
         print("\n\nChoose an example:")
         print("  1. Read and explore a mind map")
@@ -275,7 +321,7 @@ def main():
             else:
                 filepath = input("Enter path to your .smmx file: ").strip()
                 try:
-                    mindmap = read_mindmap(filepath)
+                    mindmap = load_mindmap_cached(filepath, loaded)
                     print(f"✓ Loaded: {mindmap.title}")
                 except Exception as e:
                     print(f"Error loading file: {e}")
@@ -287,6 +333,8 @@ def main():
             example_3_find_incomplete(mindmap)
         elif choice == '4':
             example_4_add_node(mindmap, filepath)
+            # The loaded copy now has the new node, which is not in this file
+            loaded.pop(filepath, None)
         elif choice == '5':
             example_5_export(mindmap, filepath)
         elif choice == '6':
@@ -295,9 +343,55 @@ def main():
             print("Invalid choice. Please try again.")
 
 
+def run_cli(argv=None):
+    """Run a single example from command-line arguments, without the menu"""
+    import argparse  # Only needed for this mode
+    
+    parser = argparse.ArgumentParser(description="Run a SimpleMind parser example")
+    parser.add_argument("--example", type=int, choices=range(1, 7), required=True,
+                        help="Example to run (1-6, as numbered in the menu)")
+    parser.add_argument("--file", help="Path to the .smmx file (examples 1-5)")
+    parser.add_argument("--query", help="Search term (example 2)")
+    parser.add_argument("--parent", help="Parent node ID (example 4)")
+    parser.add_argument("--text", help="Text for the new node (example 4)")
+    parser.add_argument("--notes", help="Notes for the new node (example 4)")
+    parser.add_argument("--format", choices=["markdown", "json", "both"],
+                        help="Export format (example 5)")
+    parser.add_argument("--title", help="Title of the new mind map (example 6)")
+    parser.add_argument("--topics", nargs="*", help="Initial topics (example 6)")
+    args = parser.parse_args(argv)
+    
+    if args.example == 6:
+        example_6_create_new(title=args.title, topics=args.topics)
+        return
+    
+    if not args.file:
+        parser.error("--file is required for examples 1-5")
+    
+    if args.example == 1:
+        example_1_read_and_explore(args.file)
+        return
+    
+    mindmap = read_mindmap(args.file)
+    
+    if args.example == 2:
+        example_2_search_nodes(mindmap, query=args.query)
+    elif args.example == 3:
+        example_3_find_incomplete(mindmap)
+    elif args.example == 4:
+        example_4_add_node(mindmap, args.file, parent_id=args.parent,
+                           text=args.text, notes=args.notes)
+    elif args.example == 5:
+        choice = {"markdown": "1", "json": "2", "both": "3"}.get(args.format)
+        example_5_export(mindmap, args.file, choice=choice)
+
+
 if __name__ == "__main__":
     try:
-        main()
+        if len(sys.argv) > 1:
+            run_cli()
+        else:
+            main()
     except KeyboardInterrupt:
         print("\n\nInterrupted. Goodbye! 👋")
     except Exception as e:
@@ -26,6 +26,11 @@ setup(
         "mcp>=1.0.0",
     ],
     extras_require={
+        "fast": [
+            "lxml>=4.6",
+            "orjson>=3.0",
+            "uvloop>=0.18; sys_platform != 'win32'",
+        ],
         "dev": [
             "pytest>=7.0",
             "black>=22.0",
@@ -34,7 +39,7 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "simplemind-mcp=simplemind_mcp_server:main",
+            "simplemind-mcp=simplemind_mcp_server:run",
         ],
     },
 )
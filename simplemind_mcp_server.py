@@ -8,10 +8,23 @@ SimpleMind (.smmx) mind map files.
 
 import asyncio
 import logging
+import math
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional, List, Dict
+from typing import Any, Optional, List, Dict, Tuple
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
@@ -31,8 +44,8 @@ from simplemind_parser import (
     SimpleMindNode,
     read_mindmap,
     write_mindmap,
-    export_to_markdown,
-    export_to_json
+    export_to_markdown_preview,
+    export_to_json_preview
 )
 
 # Configure logging
@@ -50,14 +63,162 @@ def find_smmx_files(directory: str) -> List[str]:
     if not path.exists():
         return []
     
-    if path.is_file() and path.suffix == '.smmx':
-        return [str(path)]
+    if path.is_file():
+        return [str(path)] if path.suffix == '.smmx' else []
+    
+    # Walk with os.scandir and an explicit stack: DirEntry caches the file
+    # type, so this avoids a Path object and extra stat call per entry
+    files = []
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.smmx') and entry.is_file():
+                        files.append(entry.path)
+        except OSError:
+            # Unreadable directory; skip it like a missing one
+            continue
     
-    return [str(f) for f in path.rglob('*.smmx')]
+    return files
+
+
+@lru_cache(maxsize=32)
+def _cached_parse(filepath: str, mtime_ns: int, size: int) -> SimpleMindMap:
+    """Parse a mind map; the stat fields in the key make file changes miss the cache"""
+    return read_mindmap(filepath)
+
+
+def _fingerprint(filepath: str) -> tuple:
+    """Get the (mtime_ns, size) pair that identifies a file's current contents"""
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {filepath}") from None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load(filepath: str) -> SimpleMindMap:
+    """
+    Load a mind map for read-only use, reusing the parsed copy while the
+    file is unchanged. The result is shared, so callers must not modify it.
+    """
+    return _cached_parse(filepath, *_fingerprint(filepath))
+
+
+@lru_cache(maxsize=256)
+def _summarize(filepath: str, mtime_ns: int, size: int) -> Tuple[str, int]:
+    """Title and node count of one version of a file"""
+    # Parsed outside _cached_parse: listing a directory must not evict the
+    # maps other tools are working on, or keep every listed map alive
+    mindmap = read_mindmap(filepath)
+    return mindmap.title, len(mindmap.nodes)
+
+
+def describe_mindmap_file(filepath: str) -> Dict[str, Any]:
+    """Summarize a mind map file for list_mindmaps, reporting errors inline"""
+    try:
+        title, node_count = _summarize(filepath, *_fingerprint(filepath))
+        return {
+            "path": filepath,
+            "title": title,
+            "node_count": node_count
+        }
+    except Exception as e:
+        return {
+            "path": filepath,
+            "error": str(e)
+        }
+
+
+# Used when orjson is missing or refuses the data; see _dumps
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False, separators=(",", ": "))
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result as indented JSON, using orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError:
+            # orjson stops at ~127 levels of nesting. The indenting json encoder
+            # is recursive Python, so it gets further but still raises
+            # RecursionError at roughly 500 map levels (a node is a dict plus
+            # a children list) under the default recursion limit
+            pass
+    return _JSON_ENCODER.encode(obj)
+
+
+# Responses longer than this are returned as several text parts
+_CHUNK_CHARS = 512 * 1024
+
+
+def _text_response(content: str) -> list[types.TextContent]:
+    """Wrap response text, splitting very large text into consecutive parts"""
+    if len(content) <= _CHUNK_CHARS:
+        return [types.TextContent(type="text", text=content)]
+    return [
+        types.TextContent(type="text", text=content[i:i + _CHUNK_CHARS])
+        for i in range(0, len(content), _CHUNK_CHARS)
+    ]
+
+
+def _compute_child_position(parent_x: float, parent_y: float, child_count: int,
+                            grand_x: Optional[float] = None,
+                            grand_y: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Position a new child of a parent that already has child_count children
+    
+    Children continue the line from the grandparent through the parent and
+    fan out perpendicular to it. Without a grandparent (the parent is the
+    root) they are stacked to the right of the parent.
+    """
+    if grand_x is None or grand_y is None:
+        # Parent is root or no grandparent - use simple offset
+        return parent_x + 200, parent_y + (child_count * 100)
+    
+    # Calculate direction from grandparent to parent
+    dx = parent_x - grand_x
+    dy = parent_y - grand_y
+    
+    # Continue in the same direction for the child
+    # Base position: continue the line
+    base_x = parent_x + dx
+    base_y = parent_y + dy
+    
+    if child_count == 0:
+        # First child: just continue the line
+        return base_x, base_y
+    
+    # If there are multiple children, offset them perpendicular to the main direction
+    # Calculate perpendicular direction (rotate 90 degrees)
+    perp_dx = -dy
+    perp_dy = dx
+    
+    # Normalize and scale the perpendicular offset
+    perp_length = math.sqrt(perp_dx * perp_dx + perp_dy * perp_dy)
+    if perp_length > 0:
+        scale = 80 / perp_length  # 80 pixels perpendicular spacing
+        perp_dx *= scale
+        perp_dy *= scale
+    
+    # Offset based on child index (alternating above/below the line)
+    if child_count % 2 == 0:
+        # Even: offset in positive perpendicular direction
+        offset_mult = (child_count // 2)
+    else:
+        # Odd: offset in negative perpendicular direction
+        offset_mult = -((child_count + 1) // 2)
+    
+    return base_x + (perp_dx * offset_mult), base_y + (perp_dy * offset_mult)
 
 
 def format_node_info(node: SimpleMindNode, include_children: bool = True) -> Dict[str, Any]:
     """Format a node for JSON output"""
+    children = node.children
     info = {
         'id': node.id,
         'text': node.text,
@@ -65,599 +226,615 @@ def format_node_info(node: SimpleMindNode, include_children: bool = True) -> Dic
         'parent_id': node.parent_id,
         'guid': node.guid,
         'position': {'x': node.x, 'y': node.y},
-        'child_count': len(node.children)
+        'child_count': len(children)
     }
     
     if include_children:
         info['children'] = [
             {'id': child.id, 'text': child.text}
-            for child in node.children
+            for child in children
         ]
     
     return info
 
 
+@lru_cache(maxsize=16)
+def _read_response(filepath: str, mtime_ns: int, size: int, format_type: str) -> str:
+    """Build the read_mindmap response text; repeated reads reuse it"""
+    mindmap = _cached_parse(filepath, mtime_ns, size)
+    
+    if format_type == "markdown":
+        return mindmap.to_markdown()
+    
+    if format_type == "summary":
+        # Only the root and its direct children are touched
+        return _dumps({
+            "title": mindmap.title,
+            "total_nodes": len(mindmap.nodes),
+            "root_node": mindmap.root_node.text if mindmap.root_node else None,
+            "top_level_branches": [
+                {"id": child.id, "text": child.text, "child_count": len(child.children)}
+                for child in (mindmap.root_node.children if mindmap.root_node else [])
+            ]
+        })
+    
+    # structured and json are the same full tree
+    return _dumps(mindmap.to_dict())
+
+
+@lru_cache(maxsize=32)
+def _search_response(filepath: str, mtime_ns: int, size: int,
+                     query: str, search_notes: bool) -> str:
+    """Build the search_nodes response text; repeated searches reuse it"""
+    mindmap = _cached_parse(filepath, mtime_ns, size)
+    results = mindmap.search_nodes(query, search_notes=search_notes)
+    
+    if not results:
+        return f"No nodes found matching '{query}'"
+    
+    output = {
+        "query": query,
+        "count": len(results),
+        "results": [format_node_info(node, include_children=False) for node in results]
+    }
+    return _dumps(output)
+
+
+def _invalidate_caches():
+    """Forget cached mind maps and responses after a tool writes a file"""
+    _cached_parse.cache_clear()
+    _summarize.cache_clear()
+    _read_response.cache_clear()
+    _search_response.cache_clear()
+
+
 # MCP Tool Implementations
 
-@server.list_tools()
-async def handle_list_tools() -> list[Tool]:
-    """List all available SimpleMind tools"""
-    return [
-        Tool(
-            name="list_mindmaps",
-            description="Find all SimpleMind (.smmx) files in a directory or get info about a specific file",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "path": {
-                        "type": "string",
-                        "description": "Directory to search, or path to specific .smmx file"
-                    }
+# Tool definitions never change at runtime, so they are built once at import
+_TOOLS: List[Tool] = [
+    Tool(
+        name="list_mindmaps",
+        description="Find all SimpleMind (.smmx) files in a directory or get info about a specific file",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "Directory to search, or path to specific .smmx file"
+                }
+            },
+            "required": ["path"]
+        }
+    ),
+    Tool(
+        name="read_mindmap",
+        description="Read and parse a SimpleMind file, returning its structure",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
+                },
+                "format": {
+                    "type": "string",
+                    "enum": ["structured", "markdown", "json", "summary"],
+                    "description": "Output format: structured (full tree), markdown (hierarchical), json (raw data), or summary (overview only)",
+                    "default": "structured"
+                }
+            },
+            "required": ["filepath"]
+        }
+    ),
+    Tool(
+        name="get_node",
+        description="Get detailed information about a specific node by ID",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
                 },
-                "required": ["path"]
-            }
-        ),
-        Tool(
-            name="read_mindmap",
-            description="Read and parse a SimpleMind file, returning its structure",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "format": {
-                        "type": "string",
-                        "enum": ["structured", "markdown", "json", "summary"],
-                        "description": "Output format: structured (full tree), markdown (hierarchical), json (raw data), or summary (overview only)",
-                        "default": "structured"
-                    }
+                "node_id": {
+                    "type": "string",
+                    "description": "ID of the node to retrieve"
+                }
+            },
+            "required": ["filepath", "node_id"]
+        }
+    ),
+    Tool(
+        name="search_nodes",
+        description="Search for nodes containing specific text in their title or notes",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
                 },
-                "required": ["filepath"]
-            }
-        ),
-        Tool(
-            name="get_node",
-            description="Get detailed information about a specific node by ID",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "node_id": {
-                        "type": "string",
-                        "description": "ID of the node to retrieve"
-                    }
+                "query": {
+                    "type": "string",
+                    "description": "Search query text"
                 },
-                "required": ["filepath", "node_id"]
-            }
-        ),
-        Tool(
-            name="search_nodes",
-            description="Search for nodes containing specific text in their title or notes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "query": {
-                        "type": "string",
-                        "description": "Search query text"
-                    },
-                    "search_notes": {
-                        "type": "boolean",
-                        "description": "Whether to search in notes as well as titles",
-                        "default": True
-                    }
+                "search_notes": {
+                    "type": "boolean",
+                    "description": "Whether to search in notes as well as titles",
+                    "default": True
+                }
+            },
+            "required": ["filepath", "query"]
+        }
+    ),
+    Tool(
+        name="export_mindmap",
+        description="Export a mind map to Markdown or JSON format",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
                 },
-                "required": ["filepath", "query"]
-            }
-        ),
-        Tool(
-            name="export_mindmap",
-            description="Export a mind map to Markdown or JSON format",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "format": {
-                        "type": "string",
-                        "enum": ["markdown", "json"],
-                        "description": "Export format"
-                    },
-                    "output_path": {
-                        "type": "string",
-                        "description": "Optional: path to save the exported file"
-                    }
+                "format": {
+                    "type": "string",
+                    "enum": ["markdown", "json"],
+                    "description": "Export format"
                 },
-                "required": ["filepath", "format"]
-            }
-        ),
-        Tool(
-            name="add_node",
-            description="Add a new node to a mind map",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "parent_id": {
-                        "type": "string",
-                        "description": "ID of the parent node"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "Text/title for the new node"
-                    },
-                    "notes": {
-                        "type": "string",
-                        "description": "Optional notes/content for the node",
-                        "default": ""
-                    },
-                    "output_path": {
-                        "type": "string",
-                        "description": "Optional: path to save modified mind map (defaults to overwriting original)"
-                    }
+                "output_path": {
+                    "type": "string",
+                    "description": "Optional: path to save the exported file"
                 },
-                "required": ["filepath", "parent_id", "text"]
-            }
-        ),
-        Tool(
-            name="update_node",
-            description="Update the text or notes of an existing node",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "node_id": {
-                        "type": "string",
-                        "description": "ID of the node to update"
-                    },
-                    "text": {
-                        "type": "string",
-                        "description": "New text/title for the node (leave empty to keep current)"
-                    },
-                    "notes": {
-                        "type": "string",
-                        "description": "New notes for the node (leave empty to keep current)"
-                    },
-                    "output_path": {
-                        "type": "string",
-                        "description": "Optional: path to save modified mind map (defaults to overwriting original)"
-                    }
+                "preview_only": {
+                    "type": "boolean",
+                    "description": "Optional: without output_path, only render the preview (default: false)",
+                    "default": False
+                }
+            },
+            "required": ["filepath", "format"]
+        }
+    ),
+    Tool(
+        name="add_node",
+        description="Add a new node to a mind map",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
                 },
-                "required": ["filepath", "node_id"]
-            }
-        ),
-        Tool(
-            name="delete_node",
-            description="Delete a node and all its children from a mind map",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "node_id": {
-                        "type": "string",
-                        "description": "ID of the node to delete"
-                    },
-                    "output_path": {
-                        "type": "string",
-                        "description": "Optional: path to save modified mind map (defaults to overwriting original)"
-                    }
+                "parent_id": {
+                    "type": "string",
+                    "description": "ID of the parent node"
                 },
-                "required": ["filepath", "node_id"]
-            }
-        ),
-        Tool(
-            name="get_node_path",
-            description="Get the full path from root to a specific node (breadcrumb trail)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    },
-                    "node_id": {
-                        "type": "string",
-                        "description": "ID of the node"
-                    }
+                "text": {
+                    "type": "string",
+                    "description": "Text/title for the new node"
                 },
-                "required": ["filepath", "node_id"]
-            }
-        ),
-        Tool(
-            name="find_nodes_without_notes",
-            description="Find all nodes that don't have any notes/content (useful for finding incomplete topics)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "filepath": {
-                        "type": "string",
-                        "description": "Path to the .smmx file"
-                    }
+                "notes": {
+                    "type": "string",
+                    "description": "Optional notes/content for the node",
+                    "default": ""
                 },
-                "required": ["filepath"]
-            }
+                "output_path": {
+                    "type": "string",
+                    "description": "Optional: path to save modified mind map (defaults to overwriting original)"
+                }
+            },
+            "required": ["filepath", "parent_id", "text"]
+        }
+    ),
+    Tool(
+        name="update_node",
+        description="Update the text or notes of an existing node",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
+                },
+                "node_id": {
+                    "type": "string",
+                    "description": "ID of the node to update"
+                },
+                "text": {
+                    "type": "string",
+                    "description": "New text/title for the node (leave empty to keep current)"
+                },
+                "notes": {
+                    "type": "string",
+                    "description": "New notes for the node (leave empty to keep current)"
+                },
+                "output_path": {
+                    "type": "string",
+                    "description": "Optional: path to save modified mind map (defaults to overwriting original)"
+                }
+            },
+            "required": ["filepath", "node_id"]
+        }
+    ),
+    Tool(
+        name="delete_node",
+        description="Delete a node and all its children from a mind map",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
+                },
+                "node_id": {
+                    "type": "string",
+                    "description": "ID of the node to delete"
+                },
+                "output_path": {
+                    "type": "string",
+                    "description": "Optional: path to save modified mind map (defaults to overwriting original)"
+                }
+            },
+            "required": ["filepath", "node_id"]
+        }
+    ),
+    Tool(
+        name="get_node_path",
+        description="Get the full path from root to a specific node (breadcrumb trail)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
+                },
+                "node_id": {
+                    "type": "string",
+                    "description": "ID of the node"
+                }
+            },
+            "required": ["filepath", "node_id"]
+        }
+    ),
+    Tool(
+        name="find_nodes_without_notes",
+        description="Find all nodes that don't have any notes/content (useful for finding incomplete topics)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "filepath": {
+                    "type": "string",
+                    "description": "Path to the .smmx file"
+                }
+            },
+            "required": ["filepath"]
+        }
+    )
+]
+
+
+@server.list_tools()
+async def handle_list_tools() -> list[Tool]:
+    """List all available SimpleMind tools"""
+    return list(_TOOLS)
+
+
+async def _handle_list_mindmaps(arguments: dict) -> list[types.TextContent]:
+    """List the mind maps in a directory"""
+    path = arguments["path"]
+    files = find_smmx_files(path)
+    
+    if not files:
+        return [types.TextContent(
+            type="text",
+            text=f"No .smmx files found in: {path}"
+        )]
+    
+    # Parse files in worker threads, a few at a time so large
+    # directories don't thrash the disk
+    semaphore = asyncio.Semaphore(8)
+    
+    async def describe(filepath: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(describe_mindmap_file, filepath)
+    
+    result = {
+        "count": len(files),
+        "files": await asyncio.gather(*(describe(f) for f in files))
+    }
+    
+    return [types.TextContent(
+        type="text",
+        text=_dumps(result)
+    )]
+
+
+async def _handle_read_mindmap(arguments: dict) -> list[types.TextContent]:
+    """Read a mind map in the requested format"""
+    filepath = arguments["filepath"]
+    format_type = arguments.get("format", "structured")
+    if format_type not in ("markdown", "json", "summary"):
+        format_type = "structured"
+    
+    content = _read_response(filepath, *_fingerprint(filepath), format_type)
+    
+    return _text_response(content)
+
+
+async def _handle_get_node(arguments: dict) -> list[types.TextContent]:
+    """Return one node and its children"""
+    filepath = arguments["filepath"]
+    node_id = arguments["node_id"]
+    
+    mindmap = _load(filepath)
+    node = mindmap.get_node(node_id)
+    
+    if not node:
+        return [types.TextContent(
+            type="text",
+            text=f"Node with ID '{node_id}' not found"
+        )]
+    
+    result = format_node_info(node, include_children=True)
+    return [types.TextContent(
+        type="text",
+        text=_dumps(result)
+    )]
+
+
+async def _handle_search_nodes(arguments: dict) -> list[types.TextContent]:
+    """Search node text and notes"""
+    filepath = arguments["filepath"]
+    query = arguments["query"]
+    search_notes = bool(arguments.get("search_notes", True))
+    
+    content = _search_response(filepath, *_fingerprint(filepath), query, search_notes)
+    
+    return _text_response(content)
+
+
+async def _handle_export_mindmap(arguments: dict) -> list[types.TextContent]:
+    """Export a mind map to Markdown or JSON"""
+    filepath = arguments["filepath"]
+    format_type = arguments["format"]
+    output_path = arguments.get("output_path")
+    # Nothing is saved, so only the 500 characters shown are needed
+    preview_only = arguments.get("preview_only", False) and not output_path
+    
+    if format_type != "markdown":
+        format_type = "json"
+    message = "Exported to Markdown" if format_type == "markdown" else "Exported to JSON"
+    
+    if preview_only:
+        mindmap = _load(filepath)
+        if format_type == "markdown":
+            content = export_to_markdown_preview(mindmap, 500)
+        else:
+            content = export_to_json_preview(mindmap, 500)
+    else:
+        # The export is the same text as read_mindmap's markdown/json output,
+        # so repeated exports of an unchanged file reuse the cached text
+        content = _read_response(filepath, *_fingerprint(filepath), format_type)
+        if output_path:
+            Path(output_path).write_text(content, encoding='utf-8')
+    
+    if output_path:
+        message += f" at: {output_path}"
+    
+    return [types.TextContent(
+        type="text",
+        text=f"{message}\n\nPreview:\n{content[:500]}..."
+    )]
+
+
+async def _handle_add_node(arguments: dict) -> list[types.TextContent]:
+    """Add a node under a parent and save"""
+    filepath = arguments["filepath"]
+    parent_id = arguments["parent_id"]
+    text = arguments["text"]
+    notes = arguments.get("notes", "")
+    output_path = arguments.get("output_path", filepath)
+    
+    mindmap = read_mindmap(filepath)  # Own copy: it gets modified below
+    
+    # Check if parent exists
+    parent = mindmap.get_node(parent_id)
+    if not parent:
+        return [types.TextContent(
+            type="text",
+            text=f"Error: Parent node with ID '{parent_id}' not found"
+        )]
+    
+    # Generate new ID
+    new_id = mindmap.next_node_id()
+    
+    # Calculate position intelligently based on grandparent direction
+    grandparent = mindmap.get_node(parent.parent_id) if parent.parent_id != "-1" else None
+    if grandparent:
+        new_x, new_y = _compute_child_position(
+            parent.x, parent.y, len(parent.children), grandparent.x, grandparent.y
         )
+    else:
+        new_x, new_y = _compute_child_position(parent.x, parent.y, len(parent.children))
+    
+    # Create new node
+    new_node = SimpleMindNode(
+        id=new_id,
+        text=text,
+        parent_id=parent_id,
+        x=new_x,
+        y=new_y,
+        notes=notes,
+        guid=f"GENERATED_{new_id}"
+    )
+    
+    mindmap.add_node(new_node)
+    write_mindmap(mindmap, output_path)
+    _invalidate_caches()
+    
+    return [types.TextContent(
+        type="text",
+        text=f"✓ Added node '{text}' with ID {new_id} under parent {parent_id}\n✓ Saved to: {output_path}"
+    )]
+
+
+async def _handle_update_node(arguments: dict) -> list[types.TextContent]:
+    """Update the text or notes of a node and save"""
+    filepath = arguments["filepath"]
+    node_id = arguments["node_id"]
+    new_text = arguments.get("text")
+    new_notes = arguments.get("notes")
+    output_path = arguments.get("output_path", filepath)
+    
+    if not new_text and not new_notes:
+        return [types.TextContent(
+            type="text",
+            text="Error: Must provide either text or notes to update"
+        )]
+    
+    mindmap = read_mindmap(filepath)  # Own copy: it gets modified below
+    node = mindmap.get_node(node_id)
+    
+    if not node:
+        return [types.TextContent(
+            type="text",
+            text=f"Error: Node with ID '{node_id}' not found"
+        )]
+    
+    changes = []
+    if new_text:
+        node.text = new_text
+        changes.append(f"text → '{new_text}'")
+    if new_notes is not None:  # Allow empty string to clear notes
+        node.notes = new_notes
+        changes.append(f"notes → {len(new_notes)} characters")
+    
+    write_mindmap(mindmap, output_path)
+    _invalidate_caches()
+    
+    return [types.TextContent(
+        type="text",
+        text=f"✓ Updated node {node_id}: {', '.join(changes)}\n✓ Saved to: {output_path}"
+    )]
+
+
+async def _handle_delete_node(arguments: dict) -> list[types.TextContent]:
+    """Delete a node and its descendants and save"""
+    filepath = arguments["filepath"]
+    node_id = arguments["node_id"]
+    output_path = arguments.get("output_path", filepath)
+    
+    mindmap = read_mindmap(filepath)  # Own copy: it gets modified below
+    node = mindmap.get_node(node_id)
+    
+    if not node:
+        return [types.TextContent(
+            type="text",
+            text=f"Error: Node with ID '{node_id}' not found"
+        )]
+    
+    if node.parent_id == "-1":
+        return [types.TextContent(
+            type="text",
+            text="Error: Cannot delete the root node"
+        )]
+    
+    # Detach from the parent and drop the node and all descendants
+    # in one iterative pass
+    deleted_count = mindmap.remove_node(node_id)
+    
+    write_mindmap(mindmap, output_path)
+    _invalidate_caches()
+    
+    return [types.TextContent(
+        type="text",
+        text=f"✓ Deleted node '{node.text}' and {deleted_count - 1} descendants\n✓ Saved to: {output_path}"
+    )]
+
+
+async def _handle_get_node_path(arguments: dict) -> list[types.TextContent]:
+    """Return the path from the root to a node"""
+    filepath = arguments["filepath"]
+    node_id = arguments["node_id"]
+    
+    mindmap = _load(filepath)
+    node = mindmap.get_node(node_id)
+    
+    if not node:
+        return [types.TextContent(
+            type="text",
+            text=f"Node with ID '{node_id}' not found"
+        )]
+    
+    # Build path from root to node
+    path = [
+        {"id": n.id, "text": n.text}
+        for n in mindmap.get_node_path(node_id)
+    ]
+    
+    result = {
+        "node_id": node_id,
+        "path": path,
+        "breadcrumb": " > ".join([p["text"] for p in path])
+    }
+    
+    return [types.TextContent(
+        type="text",
+        text=_dumps(result)
+    )]
+
+
+async def _handle_find_nodes_without_notes(arguments: dict) -> list[types.TextContent]:
+    """List the nodes that have no notes"""
+    filepath = arguments["filepath"]
+    
+    mindmap = _load(filepath)
+    
+    # The map keeps an index of non-root nodes without notes
+    empty_nodes = [
+        format_node_info(node, include_children=False)
+        for node in mindmap.nodes_without_notes()
     ]
+    
+    result = {
+        "count": len(empty_nodes),
+        "nodes": empty_nodes
+    }
+    
+    return [types.TextContent(
+        type="text",
+        text=_dumps(result)
+    )]
+
+
+# Tool name -> handler
+_DISPATCH = {
+    "list_mindmaps": _handle_list_mindmaps,
+    "read_mindmap": _handle_read_mindmap,
+    "get_node": _handle_get_node,
+    "search_nodes": _handle_search_nodes,
+    "export_mindmap": _handle_export_mindmap,
+    "add_node": _handle_add_node,
+    "update_node": _handle_update_node,
+    "delete_node": _handle_delete_node,
+    "get_node_path": _handle_get_node_path,
+    "find_nodes_without_notes": _handle_find_nodes_without_notes,
+}
 
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     """Handle tool execution requests"""
     
+    handler = _DISPATCH.get(name)
+    if handler is None:
+        return [types.TextContent(
+            type="text",
+            text=f"Unknown tool: {name}"
+        )]
+    
     try:
-        if name == "list_mindmaps":
-            path = arguments["path"]
-            files = find_smmx_files(path)
-            
-            if not files:
-                return [types.TextContent(
-                    type="text",
-                    text=f"No .smmx files found in: {path}"
-                )]
-            
-            result = {
-                "count": len(files),
-                "files": []
-            }
-            
-            for filepath in files:
-                try:
-                    mindmap = read_mindmap(filepath)
-                    result["files"].append({
-                        "path": filepath,
-                        "title": mindmap.title,
-                        "node_count": len(mindmap.nodes)
-                    })
-                except Exception as e:
-                    result["files"].append({
-                        "path": filepath,
-                        "error": str(e)
-                    })
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        elif name == "read_mindmap":
-            filepath = arguments["filepath"]
-            format_type = arguments.get("format", "structured")
-            
-            mindmap = read_mindmap(filepath)
-            
-            if format_type == "markdown":
-                content = mindmap.to_markdown()
-            elif format_type == "json":
-                content = json.dumps(mindmap.to_dict(), indent=2)
-            elif format_type == "summary":
-                content = json.dumps({
-                    "title": mindmap.title,
-                    "total_nodes": len(mindmap.nodes),
-                    "root_node": mindmap.root_node.text if mindmap.root_node else None,
-                    "top_level_branches": [
-                        {"id": child.id, "text": child.text, "child_count": len(child.children)}
-                        for child in (mindmap.root_node.children if mindmap.root_node else [])
-                    ]
-                }, indent=2)
-            else:  # structured
-                content = json.dumps(mindmap.to_dict(), indent=2)
-            
-            return [types.TextContent(type="text", text=content)]
-        
-        elif name == "get_node":
-            filepath = arguments["filepath"]
-            node_id = arguments["node_id"]
-            
-            mindmap = read_mindmap(filepath)
-            node = mindmap.get_node(node_id)
-            
-            if not node:
-                return [types.TextContent(
-                    type="text",
-                    text=f"Node with ID '{node_id}' not found"
-                )]
-            
-            result = format_node_info(node, include_children=True)
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        elif name == "search_nodes":
-            filepath = arguments["filepath"]
-            query = arguments["query"]
-            search_notes = arguments.get("search_notes", True)
-            
-            mindmap = read_mindmap(filepath)
-            results = mindmap.search_nodes(query, search_notes=search_notes)
-            
-            if not results:
-                return [types.TextContent(
-                    type="text",
-                    text=f"No nodes found matching '{query}'"
-                )]
-            
-            output = {
-                "query": query,
-                "count": len(results),
-                "results": [format_node_info(node, include_children=False) for node in results]
-            }
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(output, indent=2)
-            )]
-        
-        elif name == "export_mindmap":
-            filepath = arguments["filepath"]
-            format_type = arguments["format"]
-            output_path = arguments.get("output_path")
-            
-            if format_type == "markdown":
-                content = export_to_markdown(filepath, output_path)
-                message = "Exported to Markdown"
-            else:  # json
-                content = export_to_json(filepath, output_path)
-                message = "Exported to JSON"
-            
-            if output_path:
-                message += f" at: {output_path}"
-            
-            return [types.TextContent(
-                type="text",
-                text=f"{message}\n\nPreview:\n{content[:500]}..."
-            )]
-        
-        elif name == "add_node":
-            filepath = arguments["filepath"]
-            parent_id = arguments["parent_id"]
-            text = arguments["text"]
-            notes = arguments.get("notes", "")
-            output_path = arguments.get("output_path", filepath)
-            
-            mindmap = read_mindmap(filepath)
-            
-            # Check if parent exists
-            parent = mindmap.get_node(parent_id)
-            if not parent:
-                return [types.TextContent(
-                    type="text",
-                    text=f"Error: Parent node with ID '{parent_id}' not found"
-                )]
-            
-            # Generate new ID
-            new_id = str(max([int(nid) for nid in mindmap.nodes.keys()]) + 1)
-            
-            # Calculate position intelligently based on grandparent direction
-            grandparent = mindmap.get_node(parent.parent_id) if parent.parent_id != "-1" else None
-            
-            if grandparent:
-                # Calculate direction from grandparent to parent
-                dx = parent.x - grandparent.x
-                dy = parent.y - grandparent.y
-                
-                # Continue in the same direction for the child
-                # Base position: continue the line
-                base_x = parent.x + dx
-                base_y = parent.y + dy
-                
-                # If there are multiple children, offset them perpendicular to the main direction
-                if len(parent.children) > 0:
-                    # Calculate perpendicular direction (rotate 90 degrees)
-                    perp_dx = -dy
-                    perp_dy = dx
-                    
-                    # Normalize and scale the perpendicular offset
-                    import math
-                    perp_length = math.sqrt(perp_dx**2 + perp_dy**2)
-                    if perp_length > 0:
-                        perp_dx = (perp_dx / perp_length) * 80  # 80 pixels perpendicular spacing
-                        perp_dy = (perp_dy / perp_length) * 80
-                    
-                    # Offset based on child index (alternating above/below the line)
-                    child_index = len(parent.children)
-                    if child_index % 2 == 0:
-                        # Even: offset in positive perpendicular direction
-                        offset_mult = (child_index // 2)
-                    else:
-                        # Odd: offset in negative perpendicular direction
-                        offset_mult = -((child_index + 1) // 2)
-                    
-                    new_x = base_x + (perp_dx * offset_mult)
-                    new_y = base_y + (perp_dy * offset_mult)
-                else:
-                    # First child: just continue the line
-                    new_x = base_x
-                    new_y = base_y
-            else:
-                # Parent is root or no grandparent - use simple offset
-                new_x = parent.x + 200
-                new_y = parent.y + (len(parent.children) * 100)
-            
-            # Create new node
-            new_node = SimpleMindNode(
-                id=new_id,
-                text=text,
-                parent_id=parent_id,
-                x=new_x,
-                y=new_y,
-                notes=notes,
-                guid=f"GENERATED_{new_id}"
-            )
-            
-            mindmap.add_node(new_node)
-            write_mindmap(mindmap, output_path)
-            
-            return [types.TextContent(
-                type="text",
-                text=f"✓ Added node '{text}' with ID {new_id} under parent {parent_id}\n✓ Saved to: {output_path}"
-            )]
-        
-        elif name == "update_node":
-            filepath = arguments["filepath"]
-            node_id = arguments["node_id"]
-            new_text = arguments.get("text")
-            new_notes = arguments.get("notes")
-            output_path = arguments.get("output_path", filepath)
-            
-            if not new_text and not new_notes:
-                return [types.TextContent(
-                    type="text",
-                    text="Error: Must provide either text or notes to update"
-                )]
-            
-            mindmap = read_mindmap(filepath)
-            node = mindmap.get_node(node_id)
-            
-            if not node:
-                return [types.TextContent(
-                    type="text",
-                    text=f"Error: Node with ID '{node_id}' not found"
-                )]
-            
-            changes = []
-            if new_text:
-                node.text = new_text
-                changes.append(f"text → '{new_text}'")
-            if new_notes is not None:  # Allow empty string to clear notes
-                node.notes = new_notes
-                changes.append(f"notes → {len(new_notes)} characters")
-            
-            write_mindmap(mindmap, output_path)
-            
-            return [types.TextContent(
-                type="text",
-                text=f"✓ Updated node {node_id}: {', '.join(changes)}\n✓ Saved to: {output_path}"
-            )]
-        
-        elif name == "delete_node":
-            filepath = arguments["filepath"]
-            node_id = arguments["node_id"]
-            output_path = arguments.get("output_path", filepath)
-            
-            mindmap = read_mindmap(filepath)
-            node = mindmap.get_node(node_id)
-            
-            if not node:
-                return [types.TextContent(
-                    type="text",
-                    text=f"Error: Node with ID '{node_id}' not found"
-                )]
-            
-            if node.parent_id == "-1":
-                return [types.TextContent(
-                    type="text",
-                    text="Error: Cannot delete the root node"
-                )]
-            
-            # Count children to be deleted
-            def count_descendants(n):
-                count = 1
-                for child in n.children:
-                    count += count_descendants(child)
-                return count
-            
-            deleted_count = count_descendants(node)
-            
-            # Remove from parent's children list
-            parent = mindmap.get_node(node.parent_id)
-            if parent:
-                parent.children = [c for c in parent.children if c.id != node_id]
-            
-            # Remove from nodes dict (and all descendants)
-            def remove_node_and_children(n):
-                for child in n.children:
-                    remove_node_and_children(child)
-                if n.id in mindmap.nodes:
-                    del mindmap.nodes[n.id]
-            
-            remove_node_and_children(node)
-            
-            write_mindmap(mindmap, output_path)
-            
-            return [types.TextContent(
-                type="text",
-                text=f"✓ Deleted node '{node.text}' and {deleted_count - 1} descendants\n✓ Saved to: {output_path}"
-            )]
-        
-        elif name == "get_node_path":
-            filepath = arguments["filepath"]
-            node_id = arguments["node_id"]
-            
-            mindmap = read_mindmap(filepath)
-            node = mindmap.get_node(node_id)
-            
-            if not node:
-                return [types.TextContent(
-                    type="text",
-                    text=f"Node with ID '{node_id}' not found"
-                )]
-            
-            # Build path from root to node
-            path = []
-            current = node
-            while current:
-                path.insert(0, {"id": current.id, "text": current.text})
-                if current.parent_id == "-1":
-                    break
-                current = mindmap.get_node(current.parent_id)
-            
-            result = {
-                "node_id": node_id,
-                "path": path,
-                "breadcrumb": " > ".join([p["text"] for p in path])
-            }
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        elif name == "find_nodes_without_notes":
-            filepath = arguments["filepath"]
-            
-            mindmap = read_mindmap(filepath)
-            
-            empty_nodes = [
-                format_node_info(node, include_children=False)
-                for node in mindmap.nodes.values()
-                if not node.notes and node.parent_id != "-1"  # Exclude root
-            ]
-            
-            result = {
-                "count": len(empty_nodes),
-                "nodes": empty_nodes
-            }
-            
-            return [types.TextContent(
-                type="text",
-                text=json.dumps(result, indent=2)
-            )]
-        
-        else:
-            return [types.TextContent(
-                type="text",
-                text=f"Unknown tool: {name}"
-            )]
+        return await handler(arguments)
     
     except Exception as e:
         logger.error(f"Error executing tool {name}: {str(e)}", exc_info=True)
@@ -684,5 +861,13 @@ async def main():
         )
 
 
+def run():
+    """Start the server, on the uvloop event loop when it is installed"""
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -5,22 +5,233 @@ SimpleMind files (.smmx) are ZIP archives containing an XML file at document/min
 This module provides clean Python interfaces for working with mind maps.
 """
 
+import os
+import shutil
+import sys
+import uuid
 import zipfile
-import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Union
 import json
 
+# Prefer lxml (libxml2) when installed; the stdlib ElementTree covers the same calls
+try:
+    from lxml import etree as ET
+    _HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _HAS_LXML = False
+
+# Separates node strings in the search blobs; it cannot occur in XML text
+_BLOB_SEP = "\x00"
+
+# Distinct queries remembered per search index before it starts over
+_SEARCH_CACHE_SIZE = 128
+
+# Deflate level for saved archives. On mind map XML, level 3 is ~15% slower
+# than 1 for a ~7% smaller file, and level 6 (the zlib default) is ~3x slower
+_ZIP_COMPRESSLEVEL = 1
+
+# Topics serialized per step when streaming a document into the archive
+_WRITE_BATCH = 512
+
+# Wrapper around each serialized batch, stripped before it is written
+_TOPICS_OPEN = b'<topics>'
+_TOPICS_CLOSE = b'</topics>'
+
+# Stdlib JSON encoder for exports when orjson is missing; non-ASCII text is
+# written as-is, matching orjson, instead of as \u escapes
+_JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False, separators=(",", ": "))
+
+
+def _build_blob(strings: List[str]):
+    """Join strings into one search blob, returning it with each string's start offset"""
+    starts = []
+    offset = 0
+    for string in strings:
+        starts.append(offset)
+        offset += len(string) + 1
+    return _BLOB_SEP.join(strings), starts
+
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """
+    Import orjson on first use, or return None if it is not installed
+    
+    Deferred so that only JSON exports pay for loading it.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+@contextmanager
+def _atomic_output(filepath: Path):
+    """
+    Open a temporary file beside filepath for writing
+    
+    The temporary file replaces filepath (keeping its permissions, and
+    writing through a symlink) only if the block completes, so a failed
+    save never leaves a truncated file behind. The data is flushed to disk
+    before the rename, so a crash cannot leave an empty file either.
+    """
+    target = filepath.resolve() if filepath.is_symlink() else filepath
+    tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'xb') as tmp_file:
+            yield tmp_file
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        if target.exists():
+            shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _scan_blob(blob: str, starts: List[int], needle: str) -> List[int]:
+    """Return the indexes of the strings in a search blob that contain needle"""
+    if not starts:
+        return []  # No strings; an empty needle would still "match" at 0
+    hits = []
+    append = hits.append
+    find = blob.find
+    count = len(starts)
+    index = 0
+    pos = find(needle)
+    while pos != -1:
+        # Hits arrive in order, so only search past the previous string
+        index = bisect_right(starts, pos, index) - 1
+        append(index)
+        # A string only needs to match once, so resume at the next one
+        index += 1
+        if index >= count:
+            break
+        pos = find(needle, starts[index])
+    return hits
+
+
+class _ArchiveImages(MutableMapping):
+    """
+    Image hash -> binary data, read from the source .smmx on first access
+    
+    Behaves like the plain dict used for new maps. Images that are never
+    looked at (or written back) are never decompressed; membership tests
+    never read the archive, and bulk access (items, values, copy) reads all
+    pending images with a single archive open. The source file's
+    (mtime_ns, size) is recorded at read time; if the file has changed or
+    gone by the time an image is needed, loading fails instead of taking
+    another archive's images.
+    """
+    
+    def __init__(self, source: str, fingerprint: tuple):
+        self._source = source
+        self._fingerprint = fingerprint  # (st_mtime_ns, st_size) when read
+        self._data = {}  # hash -> bytes, or the archive entry name until loaded
+        self._pending = set()  # hashes whose data is still in the archive
+    
+    def add_entry(self, image_hash: str, entry_name: str):
+        """Register an archive entry to be read on first access"""
+        self._data[image_hash] = entry_name
+        self._pending.add(image_hash)
+    
+    def _load(self, hashes: Iterable[str]):
+        """Read the given pending images with a single archive open"""
+        try:
+            source_file = open(self._source, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"Cannot load images: {self._source} was removed after the mind map was read"
+            ) from None
+        
+        # Check the file actually opened, so a replacement cannot slip in
+        # between the check and the read
+        with source_file, zipfile.ZipFile(source_file, 'r') as z:
+            st = os.fstat(source_file.fileno())
+            if (st.st_mtime_ns, st.st_size) != self._fingerprint:
+                raise RuntimeError(
+                    f"Cannot load images: {self._source} changed after the mind map was read"
+                )
+            for image_hash in hashes:
+                self._data[image_hash] = z.read(self._data[image_hash])
+                self._pending.discard(image_hash)
+    
+    def __getitem__(self, image_hash: str):
+        if image_hash in self._pending:
+            self._load((image_hash,))
+        return self._data[image_hash]
+    
+    def __setitem__(self, image_hash: str, data):
+        self._data[image_hash] = data
+        self._pending.discard(image_hash)
+    
+    def __delitem__(self, image_hash: str):
+        del self._data[image_hash]
+        self._pending.discard(image_hash)
+    
+    def __contains__(self, image_hash):
+        return image_hash in self._data
+    
+    def __iter__(self):
+        return iter(self._data)
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def _load_all(self):
+        """Read every pending image with a single archive open"""
+        if self._pending:
+            self._load(list(self._pending))
+    
+    def items(self):
+        """All (hash, data) pairs; pending images are read in one pass"""
+        self._load_all()
+        return self._data.items()
+    
+    def values(self):
+        """All image data; pending images are read in one pass"""
+        self._load_all()
+        return self._data.values()
+    
+    def copy(self) -> dict:
+        """A plain dict of all images; pending images are read in one pass"""
+        self._load_all()
+        return self._data.copy()
+    
+    __copy__ = copy
+    
+    def __repr__(self):
+        return f"_ArchiveImages({self._source!r}, {len(self._data)} images, {len(self._pending)} not loaded)"
+
 
 class SimpleMindNode:
     """Represents a single node/topic in a mind map"""
     
+    # Maps can hold many thousands of nodes; slots keep each one small
+    __slots__ = (
+        '_mindmap', 'id', '_text', 'parent_id', 'x', 'y', '_notes', 'guid',
+        'palette', 'colorinfo', 'icon', 'url_link', 'layout_mode',
+        'layout_direction', 'layout_flow', 'children', 'parent_relation_guid',
+    )
+    
     def __init__(self, id: str, text: str, parent_id: str = None, 
                  x: float = 0, y: float = 0, notes: str = "", 
                  guid: str = "", palette: str = "", colorinfo: str = "",
                  icon: str = "", url_link: str = "", layout_mode: str = "",
                  layout_direction: str = "", layout_flow: str = ""):
+        self._mindmap = None  # Owning SimpleMindMap, set by SimpleMindMap.add_node
         self.id = id
         self.text = text
         self.parent_id = parent_id
@@ -38,8 +249,45 @@ class SimpleMindNode:
         self.children = []
         self.parent_relation_guid = ""  # SimpleMind Pro: parent relation styling
     
+    @property
+    def text(self) -> str:
+        """Title of the node"""
+        return self._text
+    
+    @text.setter
+    def text(self, value: str):
+        self._text = value
+        if self._mindmap is not None:
+            self._mindmap._node_changed(self)
+    
+    @property
+    def notes(self) -> str:
+        """Notes/content attached to the node"""
+        return self._notes
+    
+    @notes.setter
+    def notes(self, value: str):
+        self._notes = value
+        if self._mindmap is not None:
+            self._mindmap._node_changed(self)
+    
     def to_dict(self) -> Dict[str, Any]:
-        """Convert node to dictionary"""
+        """Convert node and all of its descendants to a nested dictionary"""
+        # Fill in children with an explicit stack rather than recursion, so
+        # deep maps cannot hit the recursion limit
+        result = self._own_dict()
+        stack = [(self, result['children'])]
+        while stack:
+            node, children = stack.pop()
+            for child in node.children:
+                child_dict = child._own_dict()
+                children.append(child_dict)
+                stack.append((child, child_dict['children']))
+        
+        return result
+    
+    def _own_dict(self) -> Dict[str, Any]:
+        """Convert this node's own fields to a dictionary with empty children"""
         result = {
             'id': self.id,
             'text': self.text,
@@ -50,7 +298,7 @@ class SimpleMindNode:
             'guid': self.guid,
             'palette': self.palette,
             'colorinfo': self.colorinfo,
-            'children': [child.to_dict() for child in self.children]
+            'children': []
         }
         
         # Include Pro features if present
@@ -86,31 +334,195 @@ class SimpleMindMap:
         self.contains_images = False  # SimpleMind Pro
         self.relations = []  # SimpleMind Pro: cross-links
         self.images = {}  # SimpleMind Pro: image hash -> binary data
+        self._empty_nodes = {}  # id -> node, for non-root nodes without notes
+        self._max_numeric_id = -1  # Highest numeric node id seen so far
+        self._search_index = None  # Flat lowercased text/notes, built on first search
     
     def add_node(self, node: SimpleMindNode):
         """Add a node to the mind map"""
         self.nodes[node.id] = node
+        node._mindmap = self
         if node.parent_id == "-1":
             self.root_node = node
         elif node.parent_id in self.nodes:
             self.nodes[node.parent_id].children.append(node)
+        self._update_empty_index(node)
+        self._track_id(node)
+        self._search_index = None
+    
+    def add_nodes(self, nodes: Iterable[SimpleMindNode]):
+        """
+        Add several nodes to the mind map at once
+        
+        Parents are linked after every node is registered, so the nodes
+        may arrive in any order.
+        """
+        nodes = list(nodes)
+        for node in nodes:
+            self.nodes[node.id] = node
+            node._mindmap = self
+        
+        for node in nodes:
+            if node.parent_id == "-1":
+                self.root_node = node
+            else:
+                parent = self.nodes.get(node.parent_id)
+                if parent is not None:
+                    parent.children.append(node)
+            self._update_empty_index(node)
+            self._track_id(node)
+        self._search_index = None
+    
+    def remove_node(self, node_id: str) -> int:
+        """
+        Remove a node and all of its descendants
+        
+        Args:
+            node_id: ID of the node to remove
+            
+        Returns:
+            Number of nodes removed (0 if the node does not exist)
+        """
+        node = self.nodes.get(node_id)
+        if node is None:
+            return 0
+        
+        # Detach from parent
+        parent = self.nodes.get(node.parent_id)
+        if parent is not None:
+            # Delete in place, stopping at the match, rather than copying
+            # the whole child list
+            children = parent.children
+            for i, child in enumerate(children):
+                if child is node:
+                    del children[i]
+                    break
+        if node is self.root_node:
+            self.root_node = None
+        
+        # Walk the subtree with an explicit stack, dropping each node as we go
+        removed = 0
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            stack.extend(n.children)
+            if self.nodes.pop(n.id, None) is not None:
+                removed += 1
+            self._empty_nodes.pop(n.id, None)
+            n._mindmap = None
+        self._search_index = None
+        
+        return removed
     
     def get_node(self, node_id: str) -> Optional[SimpleMindNode]:
         """Get a node by ID"""
         return self.nodes.get(node_id)
     
+    def get_node_path(self, node_id: str) -> List[SimpleMindNode]:
+        """
+        Get the nodes from the root down to a node (breadcrumb trail)
+        
+        Args:
+            node_id: ID of the last node in the path
+            
+        Returns:
+            Nodes ordered root first, or an empty list if the node does not exist
+        """
+        get = self.nodes.get
+        limit = len(self.nodes)  # Guards against parent cycles in broken files
+        path = []
+        
+        node = get(node_id)
+        while node is not None and len(path) < limit:
+            path.append(node)
+            if node.parent_id == "-1":
+                break
+            node = get(node.parent_id)
+        
+        path.reverse()
+        return path
+    
+    def next_node_id(self) -> str:
+        """Get an unused numeric ID for a new node"""
+        return str(self._max_numeric_id + 1)
+    
+    def get_image(self, image_hash: str) -> Optional[bytes]:
+        """Get an embedded image's data by hash (SimpleMind Pro), or None"""
+        return self.images.get(image_hash)
+    
+    def nodes_without_notes(self) -> List[SimpleMindNode]:
+        """Get all non-root nodes that have no notes (incomplete topics)"""
+        return list(self._empty_nodes.values())
+    
+    def _track_id(self, node: SimpleMindNode):
+        """Remember node's ID if it is the highest numeric ID so far"""
+        try:
+            numeric_id = int(node.id)
+        except (TypeError, ValueError):
+            return
+        if numeric_id > self._max_numeric_id:
+            self._max_numeric_id = numeric_id
+    
+    def _node_changed(self, node: SimpleMindNode):
+        """Refresh derived indexes after node's text or notes changed"""
+        self._update_empty_index(node)
+        self._search_index = None
+    
+    def _update_empty_index(self, node: SimpleMindNode):
+        """Keep the nodes-without-notes index in sync with node"""
+        if not node.notes and node.parent_id != "-1":
+            self._empty_nodes[node.id] = node
+        else:
+            self._empty_nodes.pop(node.id, None)
+    
     def search_nodes(self, query: str, search_notes: bool = True) -> List[SimpleMindNode]:
         """Search for nodes containing the query text"""
         query_lower = query.lower()
-        results = []
         
-        for node in self.nodes.values():
-            if query_lower in node.text.lower():
-                results.append(node)
-            elif search_notes and query_lower in node.notes.lower():
-                results.append(node)
+        if _BLOB_SEP in query_lower:
+            # Could match across node boundaries in the blobs
+            return [
+                node for node in self.nodes.values()
+                if query_lower in node.text.lower()
+                or (search_notes and query_lower in node.notes.lower())
+            ]
+        
+        nodes, text_blob, full_blob, hits_cache = self._get_search_index()
+        
+        # Repeated queries reuse earlier hits until the map changes
+        key = (query_lower, bool(search_notes))
+        hits = hits_cache.get(key)
+        if hits is None:
+            blob, starts = full_blob if search_notes else text_blob
+            hits = _scan_blob(blob, starts, query_lower)
+            if len(hits_cache) >= _SEARCH_CACHE_SIZE:
+                hits_cache.clear()
+            hits_cache[key] = hits
         
-        return results
+        return [nodes[i] for i in hits]
+    
+    def _get_search_index(self):
+        """
+        Get the nodes, search blobs of their lowercased text and of their
+        lowercased text and notes together, and a cache of query hits
+        
+        Built on first use and dropped whenever a node is added, removed or
+        edited. A search is then one str.find sweep over a blob rather than a
+        lower() and substring test per node.
+        """
+        if self._search_index is None:
+            nodes = list(self.nodes.values())
+            texts = [node.text.lower() for node in nodes]
+            self._search_index = (
+                nodes,
+                _build_blob(texts),
+                _build_blob([
+                    text + _BLOB_SEP + node.notes.lower()
+                    for text, node in zip(texts, nodes)
+                ]),
+                {},
+            )
+        return self._search_index
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert mind map to dictionary"""
@@ -120,32 +532,58 @@ class SimpleMindMap:
             'total_nodes': len(self.nodes)
         }
     
-    def to_markdown(self, max_depth: int = 10) -> str:
-        """Convert mind map to hierarchical Markdown"""
+    def to_markdown(self, max_depth: int = 10,
+                    max_chars: Optional[int] = None) -> str:
+        """Convert mind map to hierarchical Markdown
+        
+        With max_chars set, the walk stops as soon as that many characters
+        are produced and only that prefix is returned.
+        """
         if not self.root_node:
             return ""
         
         lines = [f"# {self.root_node.text}\n"]
         if self.root_node.notes:
             lines.append(f"{self.root_node.notes}\n")
+        # Length of "\n".join(lines) so far, kept only when it is needed
+        length = sum(len(line) for line in lines) + len(lines) - 1
+        
+        # Depth-first walk with an explicit stack, so deep maps cannot hit the
+        # recursion limit; children are pushed reversed to keep their order
+        stack = []
+        if max_depth >= 1:
+            stack.extend((child, 1) for child in reversed(self.root_node.children))
+        
+        # Header prefix per depth ("## ", "### ", ...), built once per level
+        prefixes = ["# "]
         
-        def process_children(node: SimpleMindNode, depth: int):
-            if depth > max_depth:
-                return
+        while stack:
+            if max_chars is not None and length >= max_chars:
+                break
             
-            for child in node.children:
-                # Add header
-                lines.append(f"{'#' * (depth + 1)} {child.text}\n")
-                
-                # Add notes if present
-                if child.notes:
-                    lines.append(f"{child.notes}\n")
-                
-                # Process grandchildren
-                process_children(child, depth + 1)
+            node, depth = stack.pop()
+            
+            # Add header
+            while len(prefixes) <= depth:
+                prefixes.append("#" + prefixes[-1])
+            header = f"{prefixes[depth]}{node.text}\n"
+            lines.append(header)
+            
+            # Add notes if present
+            notes = node.notes
+            if notes:
+                note_line = f"{notes}\n"
+                lines.append(note_line)
+                length += len(note_line) + 1
+            
+            length += len(header) + 1
+            
+            # Process grandchildren
+            if depth < max_depth:
+                stack.extend((child, depth + 1) for child in reversed(node.children))
         
-        process_children(self.root_node, 1)
-        return "\n".join(lines)
+        markdown = "\n".join(lines)
+        return markdown if max_chars is None else markdown[:max_chars]
     
     def __repr__(self):
         return f"SimpleMindMap(title={self.title}, nodes={len(self.nodes)})"
@@ -155,12 +593,13 @@ class SimpleMindParser:
     """Parser for SimpleMind .smmx files"""
     
     @staticmethod
-    def read(filepath: str) -> SimpleMindMap:
+    def read(filepath: str, scan_images: bool = False) -> SimpleMindMap:
         """
         Read a SimpleMind .smmx file and return a SimpleMindMap object
         
         Args:
             filepath: Path to the .smmx file
+            scan_images: Look for images even if the document declares none
             
         Returns:
             SimpleMindMap object
@@ -173,132 +612,272 @@ class SimpleMindParser:
         if not filepath.suffix == '.smmx':
             raise ValueError(f"File must be .smmx format, got: {filepath.suffix}")
         
-        # Extract XML from ZIP
         with zipfile.ZipFile(filepath, 'r') as z:
-            xml_content = z.read('document/mindmap.xml')
-        
-        # Parse XML
-        tree = ET.fromstring(xml_content)
+            return SimpleMindParser.read_zip(z, scan_images, lazy_images=True)
+    
+    @staticmethod
+    def read_zip(z: zipfile.ZipFile, scan_images: bool = False,
+                 lazy_images: bool = False) -> SimpleMindMap:
+        """
+        Read a mind map from an already opened .smmx archive
         
+        Args:
+            z: Open ZipFile of the .smmx contents (from disk or memory)
+            scan_images: Look for images even if the document declares none
+            lazy_images: Read images from z's file only when they are first
+                used (needs an archive opened from a path)
+            
+        Returns:
+            SimpleMindMap object
+        """
         # Create mind map object
         mindmap = SimpleMindMap()
         
-        # SimpleMind Pro: Extract images if present
-        with zipfile.ZipFile(filepath, 'r') as z:
-            for file_info in z.filelist:
-                if file_info.filename.startswith('images/') and file_info.filename.endswith(('.png', '.jpg', '.jpeg')):
-                    image_hash = Path(file_info.filename).stem
-                    mindmap.images[image_hash] = z.read(file_info.filename)
-        
-        # Parse metadata
-        meta = tree.find('.//meta')
-        if meta is not None:
-            title_elem = meta.find('title')
-            if title_elem is not None:
-                mindmap.title = title_elem.get('text', 'Untitled')
-            
-            guid_elem = meta.find('guid')
-            if guid_elem is not None:
-                mindmap.guid = guid_elem.get('guid', '')
-            
-            style_elem = meta.find('style')
-            if style_elem is not None:
-                mindmap.style = style_elem.get('key', 'system.bright-palette')
-            
-            scroll_elem = meta.find('scrollstate')
-            if scroll_elem is not None:
-                mindmap.zoom = int(scroll_elem.get('zoom', '100'))
-                mindmap.scroll_x = float(scroll_elem.get('x', '0'))
-                mindmap.scroll_y = float(scroll_elem.get('y', '0'))
-            
-            # SimpleMind Pro: check for images
-            images_elem = meta.find('images')
-            if images_elem is not None:
-                mindmap.contains_images = images_elem.get('containsImages', 'false').lower() == 'true'
-        
-        # Parse topics (nodes)
-        topics = tree.findall('.//topic')
-        
-        # First pass: create all nodes
-        for topic in topics:
-            node_id = topic.get('id')
-            parent_id = topic.get('parent')
-            text = topic.get('text', '')
-            x = float(topic.get('x', '0'))
-            y = float(topic.get('y', '0'))
-            guid = topic.get('guid', '')
-            palette = topic.get('palette', '')
-            colorinfo = topic.get('colorinfo', '')
-            
-            # SimpleMind Pro: icon reference
-            icon = topic.get('icon', '')
-            
-            # Get notes if present
-            notes = ""
-            note_elem = topic.find('note')
-            if note_elem is not None:
-                notes = note_elem.text or ""
-            
-            # SimpleMind Pro: URL link
-            url_link = ""
-            link_elem = topic.find('link')
-            if link_elem is not None:
-                url_link = link_elem.get('urllink', '')
-            
-            # SimpleMind Pro: layout
-            layout_mode = ""
-            layout_direction = ""
-            layout_flow = ""
-            layout_elem = topic.find('layout')
-            if layout_elem is not None:
-                layout_mode = layout_elem.get('mode', '')
-                layout_direction = layout_elem.get('direction', '')
-                layout_flow = layout_elem.get('flow', '')
-            
-            node = SimpleMindNode(
-                id=node_id,
-                text=text,
-                parent_id=parent_id,
-                x=x,
-                y=y,
-                notes=notes,
-                guid=guid,
-                palette=palette,
-                colorinfo=colorinfo,
-                icon=icon,
-                url_link=url_link,
-                layout_mode=layout_mode,
-                layout_direction=layout_direction,
-                layout_flow=layout_flow
-            )
-            
-            # SimpleMind Pro: parent relation styling
-            parent_rel_elem = topic.find('parent-relation')
-            if parent_rel_elem is not None:
-                node.parent_relation_guid = parent_rel_elem.get('guid', '')
-            
-            mindmap.add_node(node)
-        
-        # SimpleMind Pro: Parse relations (cross-links)
-        relations = tree.find('.//relations')
-        if relations is not None:
-            for relation in relations.findall('relation'):
-                mindmap.relations.append({
-                    'guid': relation.get('guid', ''),
-                    'source': relation.get('source', ''),
-                    'target': relation.get('target', '')
-                })
+        # Stream the XML instead of reading it into memory first; each
+        # topic/relation is dropped from the tree as soon as it is consumed
+        container = None
+        images_declared = None
+        topics = []
+        # The archive may be untrusted: never expand entities or fetch
+        # anything (lxml before 5.0 resolves entities by default), and keep
+        # libxml2's size/depth limits (no huge_tree)
+        iterparse_kwargs = {'resolve_entities': False, 'no_network': True} if _HAS_LXML else {}
+        with z.open('document/mindmap.xml') as xml_stream:
+            for event, elem in ET.iterparse(xml_stream, events=('start', 'end'),
+                                            **iterparse_kwargs):
+                tag = elem.tag
+                
+                if event == 'start':
+                    if tag == 'topics' or tag == 'relations':
+                        container = elem
+                    continue
+                
+                if tag == 'topic':
+                    topics.append(SimpleMindParser._parse_topic(elem))
+                elif tag == 'relation':
+                    # SimpleMind Pro: cross-links
+                    mindmap.relations.append({
+                        'guid': elem.get('guid', ''),
+                        'source': elem.get('source', ''),
+                        'target': elem.get('target', '')
+                    })
+                elif tag == 'meta':
+                    images_declared = SimpleMindParser._parse_meta(elem, mindmap)
+                    elem.clear()
+                    continue
+                else:
+                    continue
+                
+                if container is not None:
+                    container.remove(elem)
+        
+        # Link all nodes in one pass once every topic is known, so a child
+        # listed before its parent is not left out of the hierarchy
+        mindmap.add_nodes(topics)
+        
+        # SimpleMind Pro: Extract images if present. Skip the archive scan
+        # only when the document explicitly says there are none; without a
+        # declaration, scan so a later save cannot drop existing images
+        if images_declared is False and not scan_images:
+            return mindmap
+        
+        images = None
+        if lazy_images and z.filename:
+            # Fingerprint the very file being read when possible
+            try:
+                st = os.fstat(z.fp.fileno())
+            except (AttributeError, OSError, ValueError):
+                st = os.stat(z.filename)
+            images = _ArchiveImages(os.path.abspath(z.filename), (st.st_mtime_ns, st.st_size))
+            mindmap.images = images
+        
+        for file_info in z.filelist:
+            name = file_info.filename
+            if name.startswith('images/') and name.endswith(('.png', '.jpg', '.jpeg')):
+                # Same as Path(name).stem, without building a path object
+                base = name[name.rfind('/') + 1:]
+                dot = base.rfind('.')
+                image_hash = base[:dot] if dot > 0 else base
+                if images is not None:
+                    images.add_entry(image_hash, name)
+                else:
+                    mindmap.images[image_hash] = z.read(file_info)
         
         return mindmap
     
     @staticmethod
-    def write(mindmap: SimpleMindMap, filepath: str):
+    def _parse_meta(meta, mindmap: SimpleMindMap) -> Optional[bool]:
+        """
+        Apply the <meta> section of a mind map document to mindmap
+        
+        Returns:
+            Whether the document declares images, or None if it does not say
+        """
+        title_elem = meta.find('title')
+        if title_elem is not None:
+            mindmap.title = title_elem.get('text', 'Untitled')
+        
+        guid_elem = meta.find('guid')
+        if guid_elem is not None:
+            mindmap.guid = guid_elem.get('guid', '')
+        
+        style_elem = meta.find('style')
+        if style_elem is not None:
+            mindmap.style = style_elem.get('key', 'system.bright-palette')
+        
+        scroll_elem = meta.find('scrollstate')
+        if scroll_elem is not None:
+            mindmap.zoom = int(scroll_elem.get('zoom', '100'))
+            mindmap.scroll_x = float(scroll_elem.get('x', '0'))
+            mindmap.scroll_y = float(scroll_elem.get('y', '0'))
+        
+        # SimpleMind Pro: check for images
+        images_elem = meta.find('images')
+        if images_elem is not None:
+            mindmap.contains_images = images_elem.get('containsImages', 'false').lower() == 'true'
+            return mindmap.contains_images
+        return None
+    
+    @staticmethod
+    def _parse_topic(topic) -> SimpleMindNode:
+        """Build a SimpleMindNode from a <topic> element"""
+        get = topic.get  # Bound once; called for every attribute below
+        node_id = get('id')
+        parent_id = get('parent')
+        # Parent ids repeat across siblings and match other nodes' ids;
+        # interning shares the strings and makes lookups identity hits
+        if node_id is not None:
+            node_id = sys.intern(node_id)
+        if parent_id is not None:
+            parent_id = sys.intern(parent_id)
+        
+        # Child elements, found in one pass instead of one find() per tag;
+        # as with find(), the first element of each kind wins
+        children = {}
+        for child in topic:
+            children.setdefault(child.tag, child)
+        note_elem = children.get('note')
+        link_elem = children.get('link')
+        layout_elem = children.get('layout')
+        parent_rel_elem = children.get('parent-relation')
+        
+        # Get notes if present
+        notes = ""
+        if note_elem is not None:
+            notes = note_elem.text or ""
+        
+        # SimpleMind Pro: URL link
+        url_link = ""
+        if link_elem is not None:
+            url_link = link_elem.get('urllink', '')
+        
+        # SimpleMind Pro: layout
+        layout_mode = ""
+        layout_direction = ""
+        layout_flow = ""
+        if layout_elem is not None:
+            layout_mode = layout_elem.get('mode', '')
+            layout_direction = layout_elem.get('direction', '')
+            layout_flow = layout_elem.get('flow', '')
+        
+        node = SimpleMindNode(
+            id=node_id,
+            text=get('text', ''),
+            parent_id=parent_id,
+            x=float(get('x', '0')),
+            y=float(get('y', '0')),
+            notes=notes,
+            guid=get('guid', ''),
+            palette=get('palette', ''),
+            colorinfo=get('colorinfo', ''),
+            icon=get('icon', ''),  # SimpleMind Pro: icon reference
+            url_link=url_link,
+            layout_mode=layout_mode,
+            layout_direction=layout_direction,
+            layout_flow=layout_flow
+        )
+        
+        # SimpleMind Pro: parent relation styling
+        if parent_rel_elem is not None:
+            node.parent_relation_guid = parent_rel_elem.get('guid', '')
+        
+        return node
+    
+    @staticmethod
+    def _emit_topic(node: SimpleMindNode, topics_elem):
+        """Append the <topic> element for one node (not its children)"""
+        topic = ET.SubElement(topics_elem, 'topic')
+        topic.set('id', node.id)
+        topic.set('parent', node.parent_id)
+        topic.set('guid', node.guid)
+        topic.set('x', f"{node.x:.2f}")
+        topic.set('y', f"{node.y:.2f}")
+        
+        if node.palette:
+            topic.set('palette', node.palette)
+        if node.colorinfo:
+            topic.set('colorinfo', node.colorinfo)
+        
+        # SimpleMind Pro: icon
+        if node.icon:
+            topic.set('icon', node.icon)
+        
+        topic.set('text', node.text)
+        topic.set('textfmt', 'plain')
+        
+        # SimpleMind Pro: parent relation
+        if node.parent_relation_guid:
+            parent_rel = ET.SubElement(topic, 'parent-relation')
+            parent_rel.set('guid', node.parent_relation_guid)
+        
+        # SimpleMind Pro: URL link
+        if node.url_link:
+            link = ET.SubElement(topic, 'link')
+            link.set('urllink', node.url_link)
+        
+        if node.notes:
+            note = ET.SubElement(topic, 'note')
+            note.text = node.notes
+        
+        # SimpleMind Pro: layout
+        if node.layout_mode:
+            layout = ET.SubElement(topic, 'layout')
+            layout.set('mode', node.layout_mode)
+            if node.layout_direction:
+                layout.set('direction', node.layout_direction)
+            if node.layout_flow:
+                layout.set('flow', node.layout_flow)
+    
+    @staticmethod
+    def _walk_topics(root_nodes: List[SimpleMindNode]) -> Iterable[SimpleMindNode]:
+        """Yield the nodes under root_nodes in document (pre-)order"""
+        # Explicit stack, so deep maps cannot hit the recursion limit; nodes
+        # are pushed reversed to keep document order
+        stack = root_nodes[::-1]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+    
+    @staticmethod
+    def _serialize_topics(batch) -> bytes:
+        """Serialize the <topic> children of a non-empty <topics> batch element"""
+        xml = ET.tostring(batch, encoding='utf-8')
+        # Fail loudly rather than write a corrupt document if the serializer
+        # ever wraps the batch differently
+        if not (xml.startswith(_TOPICS_OPEN) and xml.endswith(_TOPICS_CLOSE)):
+            raise RuntimeError(f"Unexpected serialization of topic batch: {xml[:40]!r}...")
+        return xml[len(_TOPICS_OPEN):-len(_TOPICS_CLOSE)]
+    
+    @staticmethod
+    def write(mindmap: SimpleMindMap, filepath: str, pretty: bool = False):
         """
         Write a SimpleMindMap object to a .smmx file
         
         Args:
             mindmap: SimpleMindMap object to write
             filepath: Output path for the .smmx file
+            pretty: Indent the XML for human readers (SimpleMind does not need it)
         """
         filepath = Path(filepath)
         
@@ -347,58 +926,19 @@ class SimpleMindParser:
         # Topics section
         topics_elem = ET.SubElement(mindmap_elem, 'topics')
         
-        def add_topic_element(node: SimpleMindNode):
-            topic = ET.SubElement(topics_elem, 'topic')
-            topic.set('id', node.id)
-            topic.set('parent', node.parent_id)
-            topic.set('guid', node.guid)
-            topic.set('x', f"{node.x:.2f}")
-            topic.set('y', f"{node.y:.2f}")
-            
-            if node.palette:
-                topic.set('palette', node.palette)
-            if node.colorinfo:
-                topic.set('colorinfo', node.colorinfo)
-            
-            # SimpleMind Pro: icon
-            if node.icon:
-                topic.set('icon', node.icon)
-            
-            topic.set('text', node.text)
-            topic.set('textfmt', 'plain')
-            
-            # SimpleMind Pro: parent relation
-            if node.parent_relation_guid:
-                parent_rel = ET.SubElement(topic, 'parent-relation')
-                parent_rel.set('guid', node.parent_relation_guid)
-            
-            # SimpleMind Pro: URL link
-            if node.url_link:
-                link = ET.SubElement(topic, 'link')
-                link.set('urllink', node.url_link)
-            
-            if node.notes:
-                note = ET.SubElement(topic, 'note')
-                note.text = node.notes
-            
-            # SimpleMind Pro: layout
-            if node.layout_mode:
-                layout = ET.SubElement(topic, 'layout')
-                layout.set('mode', node.layout_mode)
-                if node.layout_direction:
-                    layout.set('direction', node.layout_direction)
-                if node.layout_flow:
-                    layout.set('flow', node.layout_flow)
-            
-            # Recursively add children
-            for child in node.children:
-                add_topic_element(child)
-        
         # Add all nodes starting from root(s)
         # SimpleMind Pro allows multiple root nodes (floating nodes)
         root_nodes = [node for node in mindmap.nodes.values() if node.parent_id == "-1"]
-        for root_node in root_nodes:
-            add_topic_element(root_node)
+        
+        if pretty:
+            # Indenting needs the whole tree
+            for node in SimpleMindParser._walk_topics(root_nodes):
+                SimpleMindParser._emit_topic(node, topics_elem)
+        else:
+            # Topics are streamed into the archive in batches (see
+            # below); a marker stands in for them in the document skeleton
+            topics_marker = f"TOPICS-{uuid.uuid4().hex}"
+            topics_elem.text = topics_marker
         
         # SimpleMind Pro: Add relations (cross-links)
         if mindmap.relations:
@@ -412,46 +952,86 @@ class SimpleMindParser:
         # Add node-groups (empty for now)
         ET.SubElement(mindmap_elem, 'node-groups')
         
-        # Convert to string with XML declaration
-        xml_string = ET.tostring(root, encoding='utf-8', xml_declaration=True)
-        
-        # Pretty print (optional but nice)
-        import xml.dom.minidom
-        dom = xml.dom.minidom.parseString(xml_string)
-        pretty_xml = dom.toprettyxml(encoding='utf-8')
+        # Convert to string with XML declaration, pretty printed only on request
+        if not pretty:
+            xml_bytes = None
+        elif _HAS_LXML:
+            xml_bytes = ET.tostring(root, encoding='utf-8', xml_declaration=True,
+                                    pretty_print=True)
+        elif hasattr(ET, 'indent'):
+            # Python 3.9+: indent the tree in place instead of re-parsing
+            # the output with minidom
+            ET.indent(root, space='  ')
+            xml_bytes = ET.tostring(root, encoding='utf-8', xml_declaration=True)
+        else:
+            xml_string = ET.tostring(root, encoding='utf-8', xml_declaration=True)
+            
+            import xml.dom.minidom
+            dom = xml.dom.minidom.parseString(xml_string)
+            xml_bytes = dom.toprettyxml(encoding='utf-8')
         
-        # Write to ZIP file
-        with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as z:
-            z.writestr('document/mindmap.xml', pretty_xml)
+        # Build the ZIP in memory
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED,
+                             compresslevel=_ZIP_COMPRESSLEVEL) as z:
+            if xml_bytes is not None:
+                z.writestr('document/mindmap.xml', xml_bytes)
+            else:
+                # Serialize and compress a batch of topics at a time, so
+                # neither the full element tree nor the full XML text is ever
+                # held in memory
+                skeleton = ET.tostring(root, encoding='utf-8', xml_declaration=True)
+                head, tail = skeleton.split(topics_marker.encode('ascii'))
+                batch = ET.Element('topics')
+                with z.open('document/mindmap.xml', 'w') as xml_out:
+                    xml_out.write(head)
+                    for node in SimpleMindParser._walk_topics(root_nodes):
+                        SimpleMindParser._emit_topic(node, batch)
+                        if len(batch) == _WRITE_BATCH:
+                            xml_out.write(SimpleMindParser._serialize_topics(batch))
+                            batch.clear()
+                    if len(batch):
+                        xml_out.write(SimpleMindParser._serialize_topics(batch))
+                    xml_out.write(tail)
             
             # SimpleMind Pro: Write images
             for image_hash, image_data in mindmap.images.items():
                 z.writestr(f'images/{image_hash}.png', image_data)
+        
+        # One write instead of one per ZIP header and member
+        with _atomic_output(filepath) as f:
+            f.write(buffer.getbuffer())
 
 
 # Convenience functions
-def read_mindmap(filepath: str) -> SimpleMindMap:
+def read_mindmap(filepath: str, scan_images: bool = False) -> SimpleMindMap:
     """Read a SimpleMind file"""
-    return SimpleMindParser.read(filepath)
+    return SimpleMindParser.read(filepath, scan_images)
+
 
+def read_mindmap_from_zip(z: zipfile.ZipFile, scan_images: bool = False) -> SimpleMindMap:
+    """Read a mind map from an open .smmx ZipFile"""
+    return SimpleMindParser.read_zip(z, scan_images)
 
-def write_mindmap(mindmap: SimpleMindMap, filepath: str):
+
+def write_mindmap(mindmap: SimpleMindMap, filepath: str, pretty: bool = False):
     """Write a SimpleMind file"""
-    SimpleMindParser.write(mindmap, filepath)
+    SimpleMindParser.write(mindmap, filepath, pretty)
 
 
-def export_to_markdown(filepath: str, output_path: Optional[str] = None) -> str:
+def export_to_markdown(source: Union[str, SimpleMindMap],
+                      output_path: Optional[str] = None) -> str:
     """
     Export a SimpleMind file to Markdown
     
     Args:
-        filepath: Path to .smmx file
+        source: Path to .smmx file, or an already loaded SimpleMindMap
         output_path: Optional path to save markdown file
         
     Returns:
         Markdown content as string
     """
-    mindmap = read_mindmap(filepath)
+    mindmap = source if isinstance(source, SimpleMindMap) else read_mindmap(source)
     markdown = mindmap.to_markdown()
     
     if output_path:
@@ -460,22 +1040,67 @@ def export_to_markdown(filepath: str, output_path: Optional[str] = None) -> str:
     return markdown
 
 
-def export_to_json(filepath: str, output_path: Optional[str] = None) -> str:
+def export_to_json(source: Union[str, SimpleMindMap],
+                  output_path: Optional[str] = None) -> str:
     """
     Export a SimpleMind file to JSON
     
     Args:
-        filepath: Path to .smmx file
+        source: Path to .smmx file, or an already loaded SimpleMindMap
         output_path: Optional path to save JSON file
         
     Returns:
         JSON content as string
     """
-    mindmap = read_mindmap(filepath)
+    mindmap = source if isinstance(source, SimpleMindMap) else read_mindmap(source)
     data = mindmap.to_dict()
-    json_str = json.dumps(data, indent=2)
+    
+    orjson = _orjson()
+    if orjson is not None:
+        try:
+            json_bytes = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except orjson.JSONEncodeError:
+            pass  # e.g. nested deeper than orjson allows; use json below
+        else:
+            # Write the encoded bytes as-is rather than re-encoding a str
+            if output_path:
+                Path(output_path).write_bytes(json_bytes)
+            return json_bytes.decode('utf-8')
+    
+    json_str = _JSON_ENCODER.encode(data)
     
     if output_path:
         Path(output_path).write_text(json_str, encoding='utf-8')
     
     return json_str
+
+
+def export_to_markdown_preview(source: Union[str, SimpleMindMap],
+                               max_chars: int = 500) -> str:
+    """
+    Return the first max_chars characters of the Markdown export
+    
+    Only the nodes needed for the prefix are rendered.
+    """
+    mindmap = source if isinstance(source, SimpleMindMap) else read_mindmap(source)
+    return mindmap.to_markdown(max_chars=max_chars)
+
+
+def export_to_json_preview(source: Union[str, SimpleMindMap],
+                           max_chars: int = 500) -> str:
+    """
+    Return the first max_chars characters of the JSON export
+    
+    The document is encoded incrementally and encoding stops once the
+    prefix is complete.
+    """
+    mindmap = source if isinstance(source, SimpleMindMap) else read_mindmap(source)
+    chunks = []
+    length = 0
+    for chunk in _JSON_ENCODER.iterencode(mindmap.to_dict()):
+        chunks.append(chunk)
+        length += len(chunk)
+        if length >= max_chars:
+            break
+    
+    return "".join(chunks)[:max_chars]
@@ -17,9 +17,12 @@ from simplemind_parser import (
     SimpleMindNode,
     SimpleMindParser,
     read_mindmap,
+    read_mindmap_from_zip,
     write_mindmap,
     export_to_markdown,
-    export_to_json
+    export_to_json,
+    export_to_markdown_preview,
+    export_to_json_preview
 )
 
 
@@ -89,6 +92,21 @@ class TestSimpleMindParser(unittest.TestCase):
         self.assertEqual(len(mindmap.root_node.children), 1)
         self.assertEqual(mindmap.root_node.children[0].text, "Child")
     
+    def test_add_nodes(self):
+        """Test adding nodes in bulk, children before parents"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_nodes([
+            SimpleMindNode(id="2", text="Grandchild", parent_id="1"),
+            SimpleMindNode(id="1", text="Child", parent_id="0"),
+            SimpleMindNode(id="0", text="Root", parent_id="-1"),
+        ])
+        
+        self.assertEqual(len(mindmap.nodes), 3)
+        self.assertEqual(mindmap.root_node.text, "Root")
+        self.assertEqual(mindmap.root_node.children[0].children[0].text, "Grandchild")
+        self.assertEqual(mindmap.next_node_id(), "3")
+        self.assertEqual(len(mindmap.nodes_without_notes()), 2)
+    
     def test_search_nodes(self):
         """Test searching for nodes"""
         mindmap = SimpleMindMap("Test Map")
@@ -110,6 +128,90 @@ class TestSimpleMindParser(unittest.TestCase):
         
         results = mindmap.search_nodes("code", search_notes=True)
         self.assertEqual(len(results), 2)
+        
+        results = mindmap.search_nodes("code", search_notes=False)
+        self.assertEqual(len(results), 1)
+        
+        # Edits are picked up by later searches
+        node2.text = "JavaScript Code"
+        node1.notes = ""
+        results = mindmap.search_nodes("programming")
+        self.assertEqual(len(results), 0)
+        results = mindmap.search_nodes("code", search_notes=False)
+        self.assertEqual(len(results), 2)
+    
+    def test_get_node_path(self):
+        """Test getting the breadcrumb trail to a node"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Branch", parent_id="0"))
+        mindmap.add_node(SimpleMindNode(id="2", text="Leaf", parent_id="1"))
+        
+        self.assertEqual([n.text for n in mindmap.get_node_path("2")],
+                         ["Root", "Branch", "Leaf"])
+        self.assertEqual([n.text for n in mindmap.get_node_path("0")], ["Root"])
+        self.assertEqual(mindmap.get_node_path("missing"), [])
+    
+    def test_next_node_id(self):
+        """Test generating IDs for new nodes"""
+        mindmap = SimpleMindMap("Test Map")
+        self.assertEqual(mindmap.next_node_id(), "0")
+        
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.add_node(SimpleMindNode(id="7", text="Seven", parent_id="0"))
+        mindmap.add_node(SimpleMindNode(id="3", text="Three", parent_id="0"))
+        self.assertEqual(mindmap.next_node_id(), "8")
+    
+    def test_nodes_without_notes(self):
+        """Test the incomplete-topic index follows note changes"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Done", parent_id="0", notes="Notes"))
+        mindmap.add_node(SimpleMindNode(id="2", text="Todo", parent_id="0"))
+        
+        self.assertEqual([n.id for n in mindmap.nodes_without_notes()], ["2"])
+        
+        mindmap.get_node("1").notes = ""
+        mindmap.get_node("2").notes = "Written"
+        self.assertEqual([n.id for n in mindmap.nodes_without_notes()], ["1"])
+    
+    def test_remove_node(self):
+        """Test removing a node removes its whole subtree"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Branch", parent_id="0"))
+        mindmap.add_node(SimpleMindNode(id="2", text="Leaf", parent_id="1"))
+        mindmap.add_node(SimpleMindNode(id="3", text="Other", parent_id="0"))
+        
+        self.assertEqual(mindmap.remove_node("1"), 2)
+        self.assertEqual(sorted(mindmap.nodes), ["0", "3"])
+        self.assertEqual([c.id for c in mindmap.root_node.children], ["3"])
+        self.assertEqual([n.id for n in mindmap.nodes_without_notes()], ["3"])
+        self.assertEqual(mindmap.remove_node("1"), 0)
+    
+    def test_search_nodes_matches_once_per_node(self):
+        """Test search results keep map order without duplicates"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="aaa", parent_id="-1", notes="aa"))
+        mindmap.add_node(SimpleMindNode(id="1", text="b", parent_id="0", notes="a"))
+        mindmap.add_node(SimpleMindNode(id="2", text="A", parent_id="0"))
+        mindmap.add_node(SimpleMindNode(id="3", text="", parent_id="0"))
+        
+        results = mindmap.search_nodes("a", search_notes=True)
+        self.assertEqual([n.id for n in results], ["0", "1", "2"])
+        
+        results = mindmap.search_nodes("a", search_notes=False)
+        self.assertEqual([n.id for n in results], ["0", "2"])
+        
+        # Matches never span two nodes
+        self.assertEqual(mindmap.search_nodes("ab", search_notes=False), [])
+        
+        results = mindmap.search_nodes("", search_notes=False)
+        self.assertEqual(len(results), 4)
+        
+        # An empty map has nothing to match, even for an empty query
+        self.assertEqual(SimpleMindMap().search_nodes(""), [])
+        self.assertEqual(SimpleMindMap().search_nodes("", search_notes=False), [])
     
     def test_to_markdown(self):
         """Test converting to markdown"""
@@ -127,6 +229,23 @@ class TestSimpleMindParser(unittest.TestCase):
         self.assertIn("## Child", markdown)
         self.assertIn("Child notes", markdown)
     
+    def test_to_markdown_order_and_depth(self):
+        """Test markdown keeps sibling order and honours max_depth on deep maps"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.add_node(SimpleMindNode(id="1", text="A", parent_id="0"))
+        mindmap.add_node(SimpleMindNode(id="2", text="A1", parent_id="1"))
+        mindmap.add_node(SimpleMindNode(id="3", text="B", parent_id="0"))
+        
+        self.assertEqual(mindmap.to_markdown(), "# Root\n\n## A\n\n### A1\n\n## B\n")
+        self.assertEqual(mindmap.to_markdown(max_depth=1), "# Root\n\n## A\n\n## B\n")
+        
+        # Deeper than the default recursion limit
+        for i in range(4, 2004):
+            mindmap.add_node(SimpleMindNode(id=str(i), text=f"Level {i}", parent_id=str(i - 1)))
+        markdown = mindmap.to_markdown(max_depth=5000)
+        self.assertIn("Level 2003", markdown)
+    
     def test_to_dict(self):
         """Test converting to dictionary"""
         mindmap = SimpleMindMap("Test Map")
@@ -139,6 +258,53 @@ class TestSimpleMindParser(unittest.TestCase):
         self.assertEqual(data['total_nodes'], 1)
         self.assertEqual(data['root']['text'], "Root")
     
+    def test_to_dict_deep_map(self):
+        """Test converting a map deeper than the recursion limit"""
+        mindmap = SimpleMindMap("Deep Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        for i in range(1, 2000):
+            mindmap.add_node(SimpleMindNode(id=str(i), text=f"Level {i}", parent_id=str(i - 1)))
+        mindmap.add_node(SimpleMindNode(id="2000", text="Sibling", parent_id="1"))
+        
+        node = mindmap.to_dict()['root']
+        self.assertEqual([c['text'] for c in node['children'][0]['children']],
+                         ["Level 2", "Sibling"])
+        depth = 0
+        while node['children']:
+            node = node['children'][0]
+            depth += 1
+        self.assertEqual(depth, 1999)
+    
+    def test_export_json_deep_map(self):
+        """Test exporting a map nested deeper than orjson allows"""
+        import json
+        
+        mindmap = SimpleMindMap("Deep Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        for i in range(1, 300):
+            mindmap.add_node(SimpleMindNode(id=str(i), text=f"Level {i}", parent_id=str(i - 1)))
+        
+        json_path = os.path.join(self.temp_dir, "deep.json")
+        json_str = export_to_json(mindmap, json_path)
+        
+        self.assertEqual(json.loads(json_str), json.loads(json.dumps(mindmap.to_dict())))
+        self.assertEqual(Path(json_path).read_text(encoding='utf-8'), json_str)
+    
+    def test_write_deep_map(self):
+        """Test writing a map deeper than the recursion limit"""
+        mindmap = SimpleMindMap("Deep Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        for i in range(1, 2000):
+            mindmap.add_node(SimpleMindNode(id=str(i), text=f"Level {i}", parent_id=str(i - 1)))
+        mindmap.add_node(SimpleMindNode(id="2000", text="Sibling", parent_id="1"))
+        
+        write_mindmap(mindmap, self.test_file)
+        loaded = read_mindmap(self.test_file)
+        
+        self.assertEqual(len(loaded.nodes), 2001)
+        self.assertEqual([c.text for c in loaded.get_node("1").children], ["Level 2", "Sibling"])
+        self.assertEqual(loaded.get_node("1999").parent_id, "1998")
+    
     def test_write_and_read(self):
         """Test writing and reading a mind map"""
         # Create mind map
@@ -177,6 +343,271 @@ class TestSimpleMindParser(unittest.TestCase):
         self.assertEqual(loaded.root_node.notes, "Test notes")
         self.assertEqual(len(loaded.root_node.children), 1)
     
+    def test_write_pretty(self):
+        """Test pretty-printed output reads back the same as compact output"""
+        import zipfile
+        
+        mindmap = SimpleMindMap("Pretty Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1", notes="Line 1\nLine 2"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Child", parent_id="0", url_link="https://example.com"))
+        
+        compact_file = os.path.join(self.temp_dir, "compact.smmx")
+        write_mindmap(mindmap, compact_file)
+        write_mindmap(mindmap, self.test_file, pretty=True)
+        
+        with zipfile.ZipFile(compact_file) as z:
+            compact_xml = z.read('document/mindmap.xml')
+        with zipfile.ZipFile(self.test_file) as z:
+            pretty_xml = z.read('document/mindmap.xml')
+        self.assertGreater(pretty_xml.count(b'\n'), compact_xml.count(b'\n'))
+        
+        self.assertEqual(read_mindmap(self.test_file).to_dict(), read_mindmap(compact_file).to_dict())
+        self.assertEqual(read_mindmap(self.test_file).root_node.notes, "Line 1\nLine 2")
+    
+    def test_read_from_open_zip(self):
+        """Test reading a mind map from an in-memory archive"""
+        import zipfile
+        from io import BytesIO
+        
+        mindmap = SimpleMindMap("Zip Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        write_mindmap(mindmap, self.test_file)
+        
+        with zipfile.ZipFile(BytesIO(Path(self.test_file).read_bytes())) as z:
+            loaded = read_mindmap_from_zip(z)
+        
+        self.assertEqual(loaded.title, "Zip Test")
+        self.assertEqual(loaded.root_node.text, "Root")
+    
+    def test_read_child_before_parent(self):
+        """Test topics listed before their parent are still linked"""
+        import zipfile
+        
+        xml = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<simplemind-mindmaps><mindmap><meta><title text="Order Test"/></meta><topics>'
+            '<topic id="2" parent="1" text="Grandchild"/>'
+            '<topic id="1" parent="0" text="Child"/>'
+            '<topic id="0" parent="-1" text="Root"/>'
+            '</topics></mindmap></simplemind-mindmaps>'
+        )
+        with zipfile.ZipFile(self.test_file, 'w') as z:
+            z.writestr('document/mindmap.xml', xml)
+        
+        loaded = read_mindmap(self.test_file)
+        self.assertEqual(loaded.root_node.text, "Root")
+        self.assertEqual([c.text for c in loaded.root_node.children], ["Child"])
+        self.assertEqual([c.text for c in loaded.get_node("1").children], ["Grandchild"])
+    
+    def test_read_external_entity(self):
+        """Test external entities in a document are never expanded"""
+        import zipfile
+        
+        secret_file = os.path.join(self.temp_dir, "secret.txt")
+        Path(secret_file).write_text("TOP SECRET", encoding='utf-8')
+        xml = (
+            '<?xml version="1.0" encoding="utf-8"?>'
+            f'<!DOCTYPE simplemind-mindmaps [<!ENTITY x SYSTEM "{Path(secret_file).as_uri()}">]>'
+            '<simplemind-mindmaps><mindmap><meta><title text="Entity Test"/></meta><topics>'
+            '<topic id="0" parent="-1" text="Root"><note>&x;</note></topic>'
+            '</topics></mindmap></simplemind-mindmaps>'
+        )
+        with zipfile.ZipFile(self.test_file, 'w') as z:
+            z.writestr('document/mindmap.xml', xml)
+        
+        try:
+            loaded = read_mindmap(self.test_file)
+        except SyntaxError:
+            return  # Rejected outright (expat: undefined entity)
+        for node in loaded.nodes.values():
+            self.assertNotIn("TOP SECRET", node.text)
+            self.assertNotIn("TOP SECRET", node.notes)
+    
+    def test_read_images(self):
+        """Test images are read unless the document declares none"""
+        import zipfile
+        
+        mindmap = SimpleMindMap("Image Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.images['abc'] = b'PNG DATA'
+        write_mindmap(mindmap, self.test_file)
+        self.assertEqual(read_mindmap(self.test_file).images, {'abc': b'PNG DATA'})
+        
+        # Images are read on demand and survive a save over their source file
+        loaded = read_mindmap(self.test_file)
+        self.assertEqual(loaded.get_image('abc'), b'PNG DATA')
+        self.assertIsNone(loaded.get_image('missing'))
+        write_mindmap(read_mindmap(self.test_file), self.test_file)
+        self.assertEqual(read_mindmap(self.test_file).get_image('abc'), b'PNG DATA')
+        
+        # Declared as image-free: the archive is not scanned unless asked
+        with zipfile.ZipFile(self.test_file) as z:
+            xml = z.read('document/mindmap.xml').replace(b'containsImages="true"',
+                                                          b'containsImages="false"')
+        with zipfile.ZipFile(self.test_file, 'w') as z:
+            z.writestr('document/mindmap.xml', xml)
+            z.writestr('images/abc.png', b'PNG DATA')
+        self.assertEqual(read_mindmap(self.test_file).images, {})
+        self.assertEqual(read_mindmap(self.test_file, scan_images=True).images,
+                         {'abc': b'PNG DATA'})
+    
+    def test_read_images_archive_opens(self):
+        """Test membership tests never read images and bulk access reads them at once"""
+        import copy
+        import zipfile
+        from unittest import mock
+        
+        mindmap = SimpleMindMap("Image Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        for i in range(5):
+            mindmap.images[f'h{i}'] = f'PNG DATA {i}'.encode()
+        write_mindmap(mindmap, self.test_file)
+        expected = dict(mindmap.images)
+        
+        for bulk_read in (lambda images: list(images.values()),
+                          lambda images: list(images.items()),
+                          lambda images: images.copy(),
+                          copy.copy):
+            loaded = read_mindmap(self.test_file)
+            with mock.patch.object(zipfile, 'ZipFile', wraps=zipfile.ZipFile) as zip_file:
+                self.assertIn('h1', loaded.images)
+                self.assertNotIn('missing', loaded.images)
+                self.assertIn("5 not loaded", repr(loaded.images))
+                self.assertEqual(zip_file.call_count, 0)
+                
+                result = bulk_read(loaded.images)
+                self.assertEqual(zip_file.call_count, 1)
+            self.assertIn("0 not loaded", repr(loaded.images))
+            self.assertEqual(loaded.images, expected)
+            if isinstance(result, dict):
+                self.assertEqual(result, expected)
+    
+    def test_read_images_source_changed(self):
+        """Test images are not taken from a file replaced after reading"""
+        mindmap = SimpleMindMap("Image Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.images['abc'] = b'PNG DATA'
+        write_mindmap(mindmap, self.test_file)
+        
+        # Replaced by another map whose image has the same hash
+        loaded = read_mindmap(self.test_file)
+        mindmap.images['abc'] = b'OTHER IMAGE DATA'
+        write_mindmap(mindmap, self.test_file)
+        with self.assertRaisesRegex(RuntimeError, "changed after the mind map was read"):
+            loaded.get_image('abc')
+        other_file = os.path.join(self.temp_dir, "other.smmx")
+        with self.assertRaisesRegex(RuntimeError, "changed after the mind map was read"):
+            write_mindmap(loaded, other_file)
+        self.assertFalse(os.path.exists(other_file))
+        
+        # Removed
+        loaded = read_mindmap(self.test_file)
+        os.remove(self.test_file)
+        with self.assertRaisesRegex(FileNotFoundError, "removed after the mind map was read"):
+            loaded.get_image('abc')
+    
+    def test_failed_write_keeps_existing_file(self):
+        """Test a failed save leaves the previous file untouched"""
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        write_mindmap(mindmap, self.test_file)
+        os.chmod(self.test_file, 0o640)
+        
+        mindmap.get_node("0").text = "Changed"
+        mindmap.images['broken'] = object()  # Not bytes, so the ZIP write fails
+        with self.assertRaises(TypeError):
+            write_mindmap(mindmap, self.test_file)
+        
+        self.assertEqual(read_mindmap(self.test_file).root_node.text, "Root")
+        self.assertEqual(os.listdir(self.temp_dir), ["test.smmx"])
+        
+        del mindmap.images['broken']
+        write_mindmap(mindmap, self.test_file)
+        self.assertEqual(read_mindmap(self.test_file).root_node.text, "Changed")
+        self.assertEqual(os.stat(self.test_file).st_mode & 0o777, 0o640)
+    
+    def test_write_rejects_unexpected_batch_wrapper(self):
+        """Test a change in how topic batches serialize fails the save"""
+        from unittest import mock
+        import simplemind_parser
+        
+        mindmap = SimpleMindMap("Test Map")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        write_mindmap(mindmap, self.test_file)
+        
+        tostring = simplemind_parser.ET.tostring
+        
+        def tostring_with_whitespace(elem, **kwargs):
+            xml = tostring(elem, **kwargs)
+            return xml.replace(b'<topics>', b'<topics >') if elem.tag == 'topics' else xml
+        
+        mindmap.get_node("0").text = "Changed"
+        with mock.patch.object(simplemind_parser.ET, 'tostring', tostring_with_whitespace):
+            with self.assertRaisesRegex(RuntimeError, "Unexpected serialization"):
+                write_mindmap(mindmap, self.test_file)
+        self.assertEqual(read_mindmap(self.test_file).root_node.text, "Root")
+    
+    def test_read_preserves_meta_and_relations(self):
+        """Test reading back metadata, Pro attributes and cross-links"""
+        mindmap = SimpleMindMap("Meta Test")
+        mindmap.guid = "MAP_GUID"
+        mindmap.zoom = 150
+        
+        root = SimpleMindNode(id="0", text="Root", parent_id="-1", guid="R")
+        mindmap.add_node(root)
+        
+        for i in range(1, 4):
+            mindmap.add_node(SimpleMindNode(
+                id=str(i),
+                text=f"Child {i}",
+                parent_id="0",
+                guid=f"C{i}",
+                url_link=f"https://example.com/{i}",
+                layout_mode="horizontal"
+            ))
+        
+        mindmap.relations.append({'guid': "REL", 'source': "1", 'target': "3"})
+        write_mindmap(mindmap, self.test_file)
+        
+        loaded = read_mindmap(self.test_file)
+        self.assertEqual(loaded.guid, "MAP_GUID")
+        self.assertEqual(loaded.zoom, 150)
+        self.assertEqual([c.text for c in loaded.root_node.children],
+                         ["Child 1", "Child 2", "Child 3"])
+        self.assertEqual(loaded.get_node("2").url_link, "https://example.com/2")
+        self.assertEqual(loaded.get_node("3").layout_mode, "horizontal")
+        self.assertEqual(loaded.relations,
+                         [{'guid': "REL", 'source': "1", 'target': "3"}])
+    
+    def test_export_loaded_mindmap(self):
+        """Test exporting from a file path and from a loaded mind map"""
+        mindmap = SimpleMindMap("Export Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1", notes="Root notes"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Child", parent_id="0"))
+        write_mindmap(mindmap, self.test_file)
+        loaded = read_mindmap(self.test_file)
+        
+        self.assertEqual(export_to_markdown(loaded), export_to_markdown(self.test_file))
+        self.assertEqual(export_to_json(loaded), export_to_json(self.test_file))
+        
+        md_path = os.path.join(self.temp_dir, "export.md")
+        markdown = export_to_markdown(mindmap, md_path)
+        self.assertEqual(Path(md_path).read_text(encoding='utf-8'), markdown)
+    
+    def test_export_preview(self):
+        """Test that previews are prefixes of the full export"""
+        mindmap = SimpleMindMap("Preview Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1", notes="Root notes"))
+        for i in range(1, 50):
+            mindmap.add_node(SimpleMindNode(id=str(i), text=f"Node {i}", parent_id=str(i // 2),
+                                            notes="Notes" if i % 3 else ""))
+        
+        markdown = export_to_markdown(mindmap)
+        json_str = export_to_json(mindmap)
+        for max_chars in (0, 1, 10, 100, 500, 10 ** 6):
+            self.assertEqual(export_to_markdown_preview(mindmap, max_chars), markdown[:max_chars])
+            self.assertEqual(export_to_json_preview(mindmap, max_chars), json_str[:max_chars])
+    
     def test_pro_features(self):
         """Test SimpleMind Pro features"""
         mindmap = SimpleMindMap("Pro Test")
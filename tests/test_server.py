@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test suite for the SimpleMind MCP server's caching
+"""
+
+import sys
+import os
+import json
+import asyncio
+from pathlib import Path
+import tempfile
+import unittest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from simplemind_parser import (
+    SimpleMindMap,
+    SimpleMindNode,
+    write_mindmap
+)
+
+try:
+    import simplemind_mcp_server as server
+except ImportError:  # mcp is not installed
+    server = None
+
+
+@unittest.skipIf(server is None, "mcp is not installed")
+class TestServerCaching(unittest.TestCase):
+    """Test that cached responses follow writes to the mind map file"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.temp_dir, "test.smmx")
+        
+        mindmap = SimpleMindMap("Cache Test")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1", notes="Root notes"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Apple", parent_id="0", x=200, y=0))
+        mindmap.add_node(SimpleMindNode(id="2", text="Banana", parent_id="0", x=200, y=100))
+        write_mindmap(mindmap, self.test_file)
+        server._invalidate_caches()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        import shutil
+        server._invalidate_caches()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+    
+    def call(self, name, **arguments):
+        """Run a tool and return its text"""
+        result = asyncio.run(server.handle_call_tool(name, arguments))
+        return "".join(content.text for content in result)
+    
+    def search(self, query):
+        """Return the texts of the nodes a search finds"""
+        text = self.call("search_nodes", filepath=self.test_file, query=query)
+        if text.startswith("No nodes found"):
+            return []
+        return [node["text"] for node in json.loads(text)["results"]]
+    
+    def summary(self):
+        """Return the read_mindmap summary"""
+        return json.loads(self.call("read_mindmap", filepath=self.test_file, format="summary"))
+    
+    def test_add_node_refreshes_search(self):
+        """Test a search after add_node finds the new node"""
+        self.assertEqual(self.search("cherry"), [])
+        self.assertEqual(self.summary()["total_nodes"], 3)
+        
+        self.call("add_node", filepath=self.test_file, parent_id="0", text="Cherry")
+        
+        self.assertEqual(self.search("cherry"), ["Cherry"])
+        self.assertEqual(self.summary()["total_nodes"], 4)
+    
+    def test_update_node_refreshes_search(self):
+        """Test a search after update_node sees the new text"""
+        self.assertEqual(self.search("apple"), ["Apple"])
+        
+        self.call("update_node", filepath=self.test_file, node_id="1", text="Apricot")
+        
+        self.assertEqual(self.search("apple"), [])
+        self.assertEqual(self.search("apricot"), ["Apricot"])
+        markdown = self.call("read_mindmap", filepath=self.test_file, format="markdown")
+        self.assertIn("Apricot", markdown)
+        self.assertNotIn("Apple", markdown)
+    
+    def test_delete_node_refreshes_search(self):
+        """Test a search after delete_node no longer finds the node"""
+        self.assertEqual(self.search("banana"), ["Banana"])
+        
+        self.call("delete_node", filepath=self.test_file, node_id="2")
+        
+        self.assertEqual(self.search("banana"), [])
+        self.assertIn("not found", self.call("get_node", filepath=self.test_file, node_id="2"))
+        self.assertEqual(self.summary()["total_nodes"], 2)
+    
+    def test_external_change_refreshes_search(self):
+        """Test responses follow a file changed outside the server"""
+        self.assertEqual(self.search("banana"), ["Banana"])
+        listing = json.loads(self.call("list_mindmaps", path=self.temp_dir))
+        self.assertEqual(listing["files"][0]["node_count"], 3)
+        
+        mindmap = SimpleMindMap("Changed Elsewhere")
+        mindmap.add_node(SimpleMindNode(id="0", text="Root", parent_id="-1"))
+        mindmap.add_node(SimpleMindNode(id="1", text="Blueberry", parent_id="0"))
+        write_mindmap(mindmap, self.test_file)
+        # Make sure the fingerprint moves even on coarse mtime clocks
+        stat = os.stat(self.test_file)
+        os.utime(self.test_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        
+        self.assertEqual(self.search("banana"), [])
+        self.assertEqual(self.search("blueberry"), ["Blueberry"])
+        self.assertEqual(self.summary()["title"], "Changed Elsewhere")
+        listing = json.loads(self.call("list_mindmaps", path=self.temp_dir))
+        self.assertEqual(listing["files"][0]["node_count"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()